@@ -8,7 +8,9 @@ Provides pose detection, energy calculation, zone management, and state machine
 from .config import Config, DEFAULT_CONFIG
 from .detection import PoseDetector, DetectionResult, get_best_device
 from .state_machine import StateMachine, GameState, ClipInfo, ClipClassifier
-from .utils import ZoneManager, EnergyCalculator, ZoneStatus
+from .utils import ZoneManager, EnergyCalculator, ZoneStatus, load_json, save_json
+from .video import GPUFrameSource
+from .pool import process_videos
 
 __all__ = [
     # Configuration
@@ -30,6 +32,14 @@ __all__ = [
     'ZoneManager',
     'EnergyCalculator',
     'ZoneStatus',
+    'load_json',
+    'save_json',
+    
+    # Video
+    'GPUFrameSource',
+    
+    # Multi-video
+    'process_videos',
 ]
 
 __version__ = '1.0.0'
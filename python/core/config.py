@@ -70,9 +70,34 @@ class Config:
     keypoint_confidence_threshold: float = 0.5  # Min confidence for keypoint
     max_skeleton_match_distance: float = 100.0  # Max pixels to match skeletons
     
+    # === INFERENCE ACCELERATION (CUDA only) ===
+    # TensorRT: Export the .pt model to an FP16 .engine once (cached next to the model)
+    #   and run inference through it. Falls back to PyTorch if export fails.
+    use_tensorrt: bool = True
+    # INT8: Path to an Ultralytics dataset YAML of representative frames (~500,
+    #   preprocessed like the pipeline) to calibrate an INT8 engine. Empty = FP16.
+    #   Re-check keypoint_confidence_threshold after switching; falls back to FP16.
+    int8_calibration_data: str = ''
+    # torch.compile: When TensorRT is off/unavailable, compile the PyTorch model
+    #   (reduce-overhead) to cut per-batch Python + kernel-launch overhead.
+    compile_model: bool = True
+    # CUDA graphs: When the model runs eagerly (no engine, no compile), capture one
+    #   forward pass at the fixed batch shape and replay it instead of launching kernels.
+    cuda_graphs: bool = True
+    # GPU decode: Decode with NVDEC (torchcodec) straight into CUDA tensors.
+    #   Used automatically on CUDA when torchcodec is installed; falls back to
+    #   cv2.VideoCapture otherwise, and when previewing (the overlay needs CPU frames).
+    gpu_decode: bool = True
+    # GPU resize: With CPU decode, upload full-size frames and resize them on the GPU
+    #   instead of cv2.resize (ignored when previewing, which draws on the small frame).
+    gpu_resize: bool = True
+    
     # === VISUALIZATION ===
     show_visuals: bool = False        # Display preview window
     debug_mode: bool = True           # Print debug messages
+    # Preview scale: Draw zones and skeletons on a frame downscaled by this factor,
+    #   then upscale once for display (1.0 draws at full size; the HUD is always full size).
+    preview_scale: float = 1.0
     
     # === COLORS (BGR format for OpenCV) ===
     color_zone_active: Tuple[int, int, int] = field(default_factory=lambda: (0, 255, 0))      # Green
@@ -91,6 +116,8 @@ class Config:
             raise ValueError("inference_batch_size must be >= 1")
         if self.process_width < 100:
             raise ValueError("process_width must be >= 100")
+        if not 0 < self.preview_scale <= 1:
+            raise ValueError("preview_scale must be between 0 and 1")
         if not 0 < self.energy_smoothing_factor <= 1:
             raise ValueError("energy_smoothing_factor must be between 0 and 1")
         if self.min_dynamic_threshold > self.max_dynamic_threshold:
@@ -5,10 +5,19 @@ Handles model loading, inference, and keypoint extraction.
 Automatically selects the best available device (MPS > CUDA > CPU).
 """
 
+import math
+import os
+import queue
+import shutil
+import tempfile
+import threading
 import cv2
 import numpy as np
 import torch
-from typing import List, Tuple, Optional
+import torch.nn.functional as F
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple, Optional, Union
 from dataclasses import dataclass
 
 from ultralytics import YOLO
@@ -44,21 +53,104 @@ def get_best_device() -> str:
     return 'cpu'
 
 
-@dataclass
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive OS lock on `path` (created if missing) across processes.
+    
+    The OS drops the lock if the holder dies, so a crashed build never leaves
+    other processes waiting on a stale lock.
+    """
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    # LK_LOCK itself only retries for ~10s before raising
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@dataclass(slots=True)
 class DetectionResult:
     """
     Container for pose detection results from a single frame.
     
     Attributes:
-        skeletons: Hip center points (cx, cy) for energy calculation
-        ankles: All detected ankle positions for zone checking
+        skeletons: Hip center points (cx, cy) for energy calculation, (N x 2) float32
+        ankles: All detected ankle positions for zone checking, (M x 2) float32
         raw_keypoints: Full keypoint data for visualization (N x 17 x 3)
     """
-    skeletons: List[Tuple[float, float]]
-    ankles: List[Tuple[float, float]]
+    skeletons: np.ndarray
+    ankles: np.ndarray
     raw_keypoints: Optional[np.ndarray] = None
 
 
+class _StreamEnd:
+    """Sentinel passed down the detect_stream queues (carries a worker error, if any)."""
+    
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+class _CUDAGraphRunner(torch.nn.Module):
+    """
+    Replays a captured CUDA graph of `module` for one fixed input shape.
+    
+    Inputs are copied into a static buffer and the graph is replayed; the
+    returned tensors are the graph's static outputs (overwritten by the next
+    call, so they must be consumed first, which the predictor does).
+    Any other input shape/dtype, or extra forward options, run `module` eagerly.
+    """
+    
+    def __init__(self, module: torch.nn.Module, example: torch.Tensor, warmup: int = 3):
+        super().__init__()
+        self.module = module
+        
+        with torch.inference_mode():
+            self.static_in = example.clone()
+            # Warm up on a side stream so lazy init / cuDNN autotuning stay out of the graph
+            side = torch.cuda.Stream()
+            side.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side):
+                for _ in range(warmup):
+                    module(self.static_in)
+            torch.cuda.current_stream().wait_stream(side)
+            
+            self.graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(self.graph):
+                self.static_out = module(self.static_in)
+    
+    def forward(self, x: torch.Tensor, *args, **kwargs):
+        if (args or any(kwargs.values())
+                or x.shape != self.static_in.shape or x.dtype != self.static_in.dtype):
+            return self.module(x, *args, **kwargs)
+        self.static_in.copy_(x)
+        self.graph.replay()
+        return self.static_out
+    
+    def __getattr__(self, name: str):
+        # Expose the wrapped model's attributes (stride, names, ...) like torch.compile does
+        try:
+            return super().__getattr__(name)
+        except AttributeError:
+            return getattr(self.module, name)
+
+
 class PoseDetector:
     """
     YOLO-based pose detector for tracking player positions.
@@ -75,6 +167,18 @@ class PoseDetector:
     RIGHT_HIP = 12
     LEFT_ANKLE = 15
     RIGHT_ANKLE = 16
+    # Hips then ankles, gathered in one indexing op per frame
+    TRACKED_KEYPOINTS = (LEFT_HIP, RIGHT_HIP, LEFT_ANKLE, RIGHT_ANKLE)
+    
+    # Shared empty (0, 2) result for frames without keypoints (treat as read-only)
+    _NO_POINTS = np.empty((0, 2), dtype=np.float32)
+    
+    # YOLO input dimensions must be multiples of the max model stride
+    STRIDE = 32
+    
+    # detect_stream queue depths, in batches (decoded frames / finished results)
+    FRAME_QUEUE_BATCHES = 2
+    RESULT_QUEUE_BATCHES = 2
     
     def __init__(self, config: Config):
         """
@@ -86,63 +190,309 @@ class PoseDetector:
         self.config = config
         self.model: Optional[YOLO] = None
         self.device: str = 'cpu'
+        self.engine_path: Optional[str] = None
+        # Processed frame size (h, w) the engine / compiled graph are built for
+        self.frame_size: Optional[Tuple[int, int]] = None
+        # PyTorch model for frames that don't fit the engine (loaded on first use)
+        self._torch_model: Optional[YOLO] = None
+        
+        # Reusable upload buffers for detect_batch (allocated on first CUDA batch)
+        self._host_buf: Optional[torch.Tensor] = None
+        self._dev_u8: Optional[torch.Tensor] = None
+        self._dev_buf: Optional[torch.Tensor] = None
         
-    def load_model(self) -> None:
+    def load_model(self, frame_size: Optional[Tuple[int, int]] = None) -> None:
         """
         Load the YOLO pose model and move to best available device.
         
         On Apple Silicon, this uses MPS for GPU acceleration.
+        On CUDA, a cached TensorRT engine is used when available (see _export_engine).
+        
+        Args:
+            frame_size: Processed frame size (h, w) that will be fed to the model.
+                        The TensorRT engine, compiled model and CUDA graph are
+                        built for it (default: a 16:9 frame at process_width)
         """
         if self.model is None:
+            if frame_size is not None:
+                self.frame_size = tuple(frame_size)
             self.device = get_best_device()
-            self.model = YOLO(self.config.model_path)
-            self.model.to(self.device)
+            
+            if self.device == 'cuda' and self.config.use_tensorrt:
+                self.engine_path = self._export_engine()
+            
+            if self.engine_path:
+                # Engines are bound to the GPU they were built on; no .to() needed
+                self.model = YOLO(self.engine_path, task='pose')
+            else:
+                self.model = YOLO(self.config.model_path)
+                self.model.to(self.device)
+                if self.device == 'cuda':
+                    compiled = self.config.compile_model and self._compile_model()
+                    # reduce-overhead compile already replays CUDA graphs
+                    if not compiled and self.config.cuda_graphs:
+                        self._capture_cuda_graph()
             
             if self.config.debug_mode:
-                print(f"✅ Loaded pose model: {self.config.model_path}")
+                print(f"✅ Loaded pose model: {self.engine_path or self.config.model_path}")
                 print(f"   Device: {self.device.upper()}")
     
-    def _parse_result(self, results) -> DetectionResult:
-        """Extract DetectionResult from a single YOLO Results object."""
-        skeletons = []
-        ankles = []
+    def _compile_model(self) -> bool:
+        """
+        Wrap the PyTorch network in torch.compile (CUDA only, non-engine path).
+        
+        Frames are always downscaled to process_width, so the input shape is
+        fixed and the graph compiles once. Warm-up passes run here so
+        compilation/autotuning happens before real frames arrive. If anything
+        fails (e.g. no Triton on this platform) the eager model is kept.
+        
+        Returns:
+            True if the compiled model is in use
+        """
+        h, w = self._inference_imgsz()
+        dummy = torch.zeros(self.config.inference_batch_size, 3, h, w, device=self.device)
+        
+        # First call builds the Ultralytics predictor (which fuses the network);
+        # compile the module it actually runs rather than YOLO.model.
+        self.model(dummy, verbose=False, device=self.device, half=True)
+        backend = self.model.predictor.model
+        eager = backend.model
+        try:
+            backend.model = torch.compile(eager, mode='reduce-overhead', fullgraph=False)
+            self.model(dummy, verbose=False, device=self.device, half=True)
+        except Exception as e:
+            backend.model = eager
+            if self.config.debug_mode:
+                print(f"⚠️ torch.compile unavailable, using eager PyTorch: {e}")
+            return False
+        return True
+    
+    def _capture_cuda_graph(self) -> None:
+        """
+        Capture the eager PyTorch network in a CUDA graph (CUDA only, non-engine path).
+        
+        detect_batch always feeds one input shape (frames are downscaled to
+        process_width and partial batches are padded), so a single forward
+        pass is captured and replayed per batch. Ultralytics' pre/post-processing
+        (NMS) still runs normally around it. Falls back to eager on failure.
+        """
+        h, w = self._inference_imgsz()
+        dummy = torch.zeros(self.config.inference_batch_size, 3, h, w, device=self.device)
+        
+        # Build the predictor, then swap in the graph for the module it runs
+        self.model(dummy, verbose=False, device=self.device, half=True)
+        backend = self.model.predictor.model
+        eager = backend.model
+        try:
+            backend.model = _CUDAGraphRunner(eager, dummy.half())
+            self.model(dummy, verbose=False, device=self.device, half=True)
+        except Exception as e:
+            backend.model = eager
+            if self.config.debug_mode:
+                print(f"⚠️ CUDA graph capture failed, using eager PyTorch: {e}")
+    
+    def _inference_imgsz(self) -> Tuple[int, int]:
+        """
+        Model input size (h, w): the processed frame size padded to the model stride.
+        
+        Without a frame_size from load_model a 16:9 frame at process_width is
+        assumed; detect_batch falls back to PyTorch for frames that don't fit.
+        """
+        w = self.config.process_width
+        h, w = self.frame_size or (w * 9 // 16, w)
+        return self._stride_size(h, w)
+    
+    def _stride_size(self, h: int, w: int) -> Tuple[int, int]:
+        """(h, w) rounded up to multiples of the model stride."""
+        return (math.ceil(h / self.STRIDE) * self.STRIDE, math.ceil(w / self.STRIDE) * self.STRIDE)
+    
+    def _export_engine(self) -> Optional[str]:
+        """
+        Build (or reuse) a TensorRT engine for the pose model.
+        
+        INT8 is used when config.int8_calibration_data points at a calibration
+        dataset; otherwise (or if the INT8 build fails) the engine is FP16.
+        Engines are cached next to the .pt file, keyed by input size, batch
+        size and precision so changing --width/--batch triggers a rebuild.
+        
+        Returns:
+            Path to the engine, or None if export failed (e.g. TensorRT missing)
+        """
+        if self.config.int8_calibration_data:
+            engine_path = self._build_engine(int8=True)
+            if engine_path:
+                return engine_path
+        return self._build_engine(int8=False)
+    
+    def _build_engine(self, int8: bool) -> Optional[str]:
+        """Export one engine variant (see _export_engine). Returns None on failure."""
+        h, w = self._inference_imgsz()
+        batch = self.config.inference_batch_size
+        precision = 'int8' if int8 else 'fp16'
+        model_path = Path(self.config.model_path)
+        engine_path = model_path.with_name(f"{model_path.stem}-{w}x{h}-b{batch}-{precision}.engine")
+        if engine_path.exists():
+            return str(engine_path)
+        
+        # Worker processes may build the same engine at once: serialize builds
+        # with a lock and re-check, so later ones reuse the first one's engine
+        with _exclusive_lock(engine_path.with_name(f".{engine_path.name}.lock")):
+            if engine_path.exists():
+                return str(engine_path)
+            
+            if self.config.debug_mode:
+                print(f"⚙️  Building TensorRT engine (one-time): {engine_path.name}")
+            precision_args = (
+                {'int8': True, 'data': self.config.int8_calibration_data} if int8 else {'half': True}
+            )
+            try:
+                # Export from a private copy of the weights: Ultralytics writes
+                # <stem>.onnx / <stem>.engine next to them, which other variants
+                # (and other processes) share. Same directory keeps the replace atomic.
+                with tempfile.TemporaryDirectory(dir=model_path.parent, prefix=".engine-build-") as tmp:
+                    source = model_path
+                    if model_path.exists():
+                        source = Path(tmp) / model_path.name
+                        shutil.copy2(model_path, source)
+                    # Static shape: detect_batch pads partial batches to `batch`, so the
+                    # engine only needs tactics for a single input shape
+                    exported = YOLO(str(source)).export(
+                        format='engine',
+                        imgsz=(h, w),
+                        batch=batch,
+                        dynamic=False,
+                        workspace=4,
+                        verbose=False,
+                        **precision_args
+                    )
+                    Path(exported).replace(engine_path)
+            except Exception as e:
+                if self.config.debug_mode:
+                    fallback = "FP16" if int8 else "PyTorch"
+                    print(f"⚠️ TensorRT {precision.upper()} export failed, using {fallback}: {e}")
+                return None
+        return str(engine_path)
+    
+    def _padded_size(self, h: int, w: int) -> Optional[Tuple[int, int]]:
+        """
+        Model input size for (h, w) frames passed as tensors (Ultralytics does
+        no letterboxing for tensor input, so we pad ourselves).
+        
+        PyTorch accepts any multiple of the stride. A static TensorRT engine
+        needs exactly its export size, so frames are padded up to it, or None
+        is returned if they do not fit (caller runs the PyTorch model instead).
+        """
+        ph, pw = self._stride_size(h, w)
+        if self.engine_path is None:
+            return ph, pw
+        eh, ew = self._inference_imgsz()
+        return (eh, ew) if ph <= eh and pw <= ew else None
+    
+    def _pytorch_model(self) -> YOLO:
+        """PyTorch model for frames that don't fit the TensorRT engine (loaded on first use)."""
+        if self._torch_model is None:
+            if self.config.debug_mode:
+                eh, ew = self._inference_imgsz()
+                print(f"⚠️ Frames larger than the TensorRT engine input ({ew}x{eh}), using PyTorch")
+            self._torch_model = YOLO(self.config.model_path)
+            self._torch_model.to(self.device)
+        return self._torch_model
+    
+    def _target_size(self, h: int, w: int) -> Tuple[int, int]:
+        """Processed frame size (h, w) for an (h, w) frame: scaled to process_width, same as main.py."""
+        tw = self.config.process_width
+        return (h, w) if w == tw else (int(h * (tw / w)), tw)
+    
+    def _upload_batch(
+        self,
+        frames: Sequence[np.ndarray],
+        target: Tuple[int, int],
+        size: Tuple[int, int]
+    ) -> torch.Tensor:
+        """
+        Upload BGR frames to the GPU through reusable pinned/device buffers.
+        
+        Frames are stacked into a pinned host buffer, copied asynchronously as
+        uint8, then converted on-device to normalized RGB fp16 CHW, resized
+        (bilinear) to `target` if they arrive at source resolution. The device
+        buffer is zero-padded at the bottom/right to `size` (see _padded_size),
+        so the returned tensor can be passed straight to the model or engine.
+        Buffers are only reallocated when the frame size or batch size grows.
+        
+        Returns:
+            (B, 3, H_pad, W_pad) float16 view into the device buffer
+        """
+        n = len(frames)
+        h, w = frames[0].shape[:2]
+        th, tw = target
+        ph, pw = size
+        if (self._host_buf is None or self._host_buf.shape[1:3] != (h, w)
+                or self._host_buf.shape[0] < n or self._dev_buf.shape[2:] != (ph, pw)):
+            b = max(n, self.config.inference_batch_size)
+            self._host_buf = torch.empty((b, h, w, 3), dtype=torch.uint8, pin_memory=True)
+            self._dev_u8 = torch.empty((b, h, w, 3), dtype=torch.uint8, device=self.device)
+            self._dev_buf = torch.zeros((b, 3, ph, pw), dtype=torch.float16, device=self.device)
+        
+        np.stack(frames, out=self._host_buf.numpy()[:n])
+        staged = self._dev_u8[:n]
+        staged.copy_(self._host_buf[:n], non_blocking=True)
+        
+        # BGR HWC uint8 -> RGB CHW fp16 in [0, 1], written into the padded buffer
+        rgb = staged.flip(-1).permute(0, 3, 1, 2)
+        if (th, tw) != (h, w):
+            rgb = F.interpolate(rgb.half(), size=(th, tw), mode='bilinear', align_corners=False)
+        out = self._dev_buf[:n, :, :th, :tw]
+        out.copy_(rgb)
+        out.div_(255)
+        return self._dev_buf[:n]
+    
+    def _fetch_keypoints(self, results_list) -> List[Optional[np.ndarray]]:
+        """
+        Copy the keypoints of a whole batch to the host in one transfer.
+        
+        All frames' keypoints are concatenated on the device and copied once
+        (small device->host copies are latency-bound, and each one syncs),
+        then split back per frame as numpy views. Only the 4 tracked keypoints
+        are copied unless visualizing, which needs the full set.
+        
+        Returns:
+            Per frame: (N, 17, 3) or (N, 4, 3) keypoints, or None if absent
+        """
+        datas = [r.keypoints.data for r in results_list if r.keypoints is not None]
+        if not datas:
+            return [None] * len(results_list)
+        
+        all_kp = torch.cat(datas)
+        if not self.config.show_visuals:
+            all_kp = all_kp[:, self.TRACKED_KEYPOINTS]
+        host = all_kp.cpu().numpy()
+        
+        per_frame = iter(np.split(host, np.cumsum([len(d) for d in datas])[:-1]))
+        return [next(per_frame) if r.keypoints is not None else None for r in results_list]
+    
+    def _parse_keypoints(self, keypoints: Optional[np.ndarray]) -> DetectionResult:
+        """Extract DetectionResult from one frame's host keypoints (see _fetch_keypoints)."""
+        skeletons = self._NO_POINTS
+        ankles = self._NO_POINTS
         raw_keypoints = None
 
-        if results.keypoints is not None:
-            kp_data = results.keypoints.data
+        if keypoints is not None:
             conf_thresh = self.config.keypoint_confidence_threshold
 
-            # Only copy to numpy for visualization; otherwise use CPU tensor (avoids extra copy)
+            # Full keypoint set (x, y, conf) when visualizing, else the 4 tracked ones
             if self.config.show_visuals:
-                raw_keypoints = kp_data.cpu().numpy()
-                kp_iter = raw_keypoints
+                raw_keypoints = keypoints
+                tracked = keypoints[:, self.TRACKED_KEYPOINTS]
             else:
-                raw_keypoints = None
-                kp_iter = list(kp_data.cpu())  # Single transfer, no numpy copy
-
-            for kp in kp_iter:
-                if len(kp) == 0:
-                    continue
-
-                # Extract hip center for energy tracking
-                left_hip = kp[self.LEFT_HIP]
-                right_hip = kp[self.RIGHT_HIP]
-                lh_conf = float(left_hip[2])
-                rh_conf = float(right_hip[2])
+                tracked = keypoints  # (N, 4, 3)
+            confident = tracked[..., 2] > conf_thresh
 
-                if lh_conf > conf_thresh and rh_conf > conf_thresh:
-                    cx = (float(left_hip[0]) + float(right_hip[0])) / 2
-                    cy = (float(left_hip[1]) + float(right_hip[1])) / 2
-                    skeletons.append((cx, cy))
+            # Hip centers for energy tracking (both hips must be confident)
+            hip_mask = confident[:, :2].all(axis=1)
+            skeletons = tracked[hip_mask, :2, :2].mean(axis=1, dtype=np.float32)
 
-                # Extract ankles for zone detection
-                left_ankle = kp[self.LEFT_ANKLE]
-                right_ankle = kp[self.RIGHT_ANKLE]
-
-                if float(left_ankle[2]) > conf_thresh:
-                    ankles.append((float(left_ankle[0]), float(left_ankle[1])))
-                if float(right_ankle[2]) > conf_thresh:
-                    ankles.append((float(right_ankle[0]), float(right_ankle[1])))
+            # Ankles for zone detection (left then right, per person)
+            ankles = np.ascontiguousarray(tracked[:, 2:][confident[:, 2:]][:, :2], dtype=np.float32)
 
         return DetectionResult(
             skeletons=skeletons,
@@ -163,27 +513,75 @@ class PoseDetector:
         results = self.detect_batch([frame])
         return results[0]
 
-    def detect_batch(self, frames: List[np.ndarray]) -> List[DetectionResult]:
+    def detect_batch(
+        self,
+        frames: Union[Sequence[np.ndarray], Sequence[torch.Tensor], torch.Tensor]
+    ) -> List[DetectionResult]:
         """
         Run pose detection on a batch of frames for improved GPU throughput.
 
         Args:
-            frames: List of BGR images (numpy arrays) - should be already downscaled
+            frames: Either a list of BGR images (numpy arrays), or GPU-decoded
+                    RGB uint8 frames as a (B, 3, H, W) tensor / list of (3, H, W)
+                    tensors (see GPUFrameSource). BGR images may be full size
+                    (resized to process_width here, on the GPU under CUDA);
+                    tensors must be downscaled (they are zero-padded to the
+                    model stride here).
 
         Returns:
             List of DetectionResult, one per input frame
         """
-        if not frames:
+        if len(frames) == 0:
             return []
 
+        if not isinstance(frames, torch.Tensor) and isinstance(frames[0], torch.Tensor):
+            frames = torch.stack(list(frames))
+        is_tensor = isinstance(frames, torch.Tensor)
+
+        # Processed frame size, and the model input size it is padded to
+        frame_hw = tuple(frames.shape[2:]) if is_tensor else self._target_size(*frames[0].shape[:2])
         if self.model is None:
-            self.load_model()
+            self.load_model(frame_hw)
+        model = self.model
+        size = self._padded_size(*frame_hw)
+        if size is None:
+            # Frames don't fit the static engine (built for another frame size)
+            model = self._pytorch_model()
+            size = self._stride_size(*frame_hw)
+        on_engine = model is self.model and self.engine_path is not None
+
+        # Use FP16 for faster inference on GPU (CUDA/MPS); skip on CPU.
+        # A TensorRT engine has its precision baked in at export time.
+        use_half = self.device in ('cuda', 'mps') and not on_engine
 
-        # Use FP16 for faster inference on GPU (CUDA/MPS); skip on CPU
-        use_half = self.device in ('cuda', 'mps')
+        # On CUDA, pad partial batches (end of video) up to the configured batch
+        # by repeating the last frame, so the engine / compiled graph always
+        # sees one fixed input shape. Padded results are dropped below.
+        n = len(frames)
+        pad = self.config.inference_batch_size - n if self.device == 'cuda' else 0
+
+        if pad > 0:
+            if is_tensor:
+                frames = torch.cat([frames, frames[-1:].expand(pad, *frames.shape[1:])])
+            else:
+                frames = list(frames) + [frames[-1]] * pad
+        if is_tensor:
+            # Ultralytics takes tensors as-is (no letterboxing): normalized float
+            # BCHW on the target device, with both sides a multiple of the stride
+            frames = frames.to(self.device, non_blocking=True).float().div_(255)
+            if size != tuple(frames.shape[2:]):
+                frames = F.pad(frames, (0, size[1] - frames.shape[3], 0, size[0] - frames.shape[2]))
+        else:
+            # Preprocess (and resize full-size frames) on the GPU for both the
+            # engine and PyTorch paths; elsewhere resize on the CPU if needed
+            h, w = frames[0].shape[:2]
+            if self.device == 'cuda':
+                frames = self._upload_batch(frames, frame_hw, size)
+            elif frame_hw != (h, w):
+                frames = [cv2.resize(f, (frame_hw[1], frame_hw[0])) for f in frames]
 
         # Run batched inference
-        results_list = self.model(
+        results_list = model(
             frames,
             verbose=False,
             device=self.device,
@@ -191,7 +589,119 @@ class PoseDetector:
         )
 
         # Ultralytics returns list of Results for list input
-        return [self._parse_result(r) for r in results_list]
+        keypoints = self._fetch_keypoints(results_list[:n])
+        return [self._parse_keypoints(kp) for kp in keypoints]
+
+    def max_frames_in_flight(self) -> int:
+        """
+        Upper bound on frames detect_stream references at once.
+        
+        Counts the frame queue, the batch being inferred, the result queue,
+        the batch the caller is consuming, and the frame the producer holds.
+        Frame sources that recycle output buffers need at least this many.
+        """
+        batches = self.FRAME_QUEUE_BATCHES + 1 + self.RESULT_QUEUE_BATCHES + 1
+        return batches * self.config.inference_batch_size + 1
+    
+    def detect_stream(
+        self,
+        frames: Iterable[Tuple[Any, np.ndarray]]
+    ) -> Iterator[Tuple[List[Any], List[np.ndarray], List[DetectionResult]]]:
+        """
+        Run pose detection over a stream of frames, overlapping decode and inference.
+        
+        Three stages connected by bounded queues:
+            1. Producer thread: pulls (tag, frame) items from `frames` (decode happens here)
+            2. Inference thread: groups frames into batches and runs detect_batch
+            3. Caller: consumes each batch (state machine, visuals) while the
+               next batch is being decoded and inferred
+        
+        Close the generator (or let it finish) to stop the worker threads.
+        
+        Args:
+            frames: Iterable of (tag, frame) pairs; tag is passed through untouched
+        
+        Yields:
+            (tags, frames, detections) per batch, in input order, as parallel
+            lists so callers can vectorize over tags without re-unpacking pairs
+        """
+        if self.model is None:
+            self.load_model()
+        
+        batch_size = self.config.inference_batch_size
+        frame_q: queue.Queue = queue.Queue(maxsize=self.FRAME_QUEUE_BATCHES * batch_size)
+        result_q: queue.Queue = queue.Queue(maxsize=self.RESULT_QUEUE_BATCHES)
+        stop = threading.Event()
+        
+        def put(q: queue.Queue, item) -> bool:
+            # Blocking put that gives up once the consumer has gone away
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return None
+        
+        def produce():
+            try:
+                for item in frames:
+                    if not put(frame_q, item):
+                        return
+            except BaseException as e:
+                put(frame_q, _StreamEnd(e))
+                return
+            put(frame_q, _StreamEnd())
+        
+        def infer():
+            tags, batch_frames = [], []
+            try:
+                while True:
+                    item = get(frame_q)
+                    if item is None:
+                        return
+                    end = isinstance(item, _StreamEnd)
+                    if not end:
+                        tags.append(item[0])
+                        batch_frames.append(item[1])
+                    if tags and (len(tags) >= batch_size or end):
+                        detections = self.detect_batch(batch_frames)
+                        if not put(result_q, (tags, batch_frames, detections)):
+                            return
+                        tags, batch_frames = [], []
+                    if end:
+                        put(result_q, item)
+                        return
+            except BaseException as e:
+                put(result_q, _StreamEnd(e))
+        
+        workers = [
+            threading.Thread(target=produce, name="pose-decode", daemon=True),
+            threading.Thread(target=infer, name="pose-infer", daemon=True),
+        ]
+        for t in workers:
+            t.start()
+        
+        try:
+            while True:
+                result = result_q.get()
+                if isinstance(result, _StreamEnd):
+                    if result.error is not None:
+                        raise result.error
+                    return
+                yield result
+        finally:
+            stop.set()
+            for t in workers:
+                t.join()
     
     def get_device(self) -> str:
         """Get the device being used for inference."""
@@ -0,0 +1,75 @@
+"""
+Multi-video processing for Roundnet Condenser.
+
+Runs several videos at once in separate worker processes, each building its
+own PoseDetector / StateMachine, so one video's decode and CPU-side logic
+overlap another's GPU inference.
+"""
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence, Union
+
+from .config import Config
+
+# Default worker processes; more than ~2 per GPU rarely helps (they share the device)
+DEFAULT_WORKERS = 2
+
+# Called as each video finishes: (config, result, error); exactly one of result/error is None
+DoneCallback = Callable[[Config, Optional[dict], Optional[BaseException]], None]
+
+
+def process_videos(
+    configs: Sequence[Config],
+    worker: Callable[[Config], dict],
+    max_workers: Optional[int] = None,
+    on_done: Optional[DoneCallback] = None
+) -> List[Union[dict, BaseException]]:
+    """
+    Run `worker(config)` for every config, several videos at a time.
+    
+    Workers are started with 'spawn' since CUDA cannot be re-initialized in a
+    forked child. `worker` must therefore be picklable, i.e. a module-level
+    function such as main.process_video. In a frozen build (the PyInstaller
+    roundnet-engine binary) each spawned worker re-launches the executable, so
+    the entry point must call multiprocessing.freeze_support() before main(),
+    as main.py does. With a single video (or a single worker) everything runs
+    in-process.
+    
+    A failing video doesn't stop the others: its exception is reported and
+    returned in place of its result.
+    
+    Args:
+        configs: One Config per video
+        worker: Function that processes one video and returns its result dict
+        max_workers: Maximum worker processes (default: DEFAULT_WORKERS)
+        on_done: Optional callback invoked (in this process) as each video
+                 finishes, in completion order, so results can be saved early
+        
+    Returns:
+        Per config, in the same order: its result dict or the exception it raised
+    """
+    outcomes: List[Union[dict, BaseException, None]] = [None] * len(configs)
+    
+    def finish(i: int, result: Optional[dict], error: Optional[BaseException]):
+        outcomes[i] = error if error is not None else result
+        if on_done:
+            on_done(configs[i], result, error)
+    
+    num_workers = min(len(configs), max_workers or DEFAULT_WORKERS)
+    if num_workers <= 1:
+        for i, config in enumerate(configs):
+            try:
+                result = worker(config)
+            except Exception as e:
+                finish(i, None, e)
+            else:
+                finish(i, result, None)
+        return outcomes
+    
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp.get_context('spawn')) as pool:
+        futures = {pool.submit(worker, config): i for i, config in enumerate(configs)}
+        for future in as_completed(futures):
+            error = future.exception()
+            finish(futures[future], None if error else future.result(), error)
+    return outcomes
@@ -7,30 +7,36 @@ The Logic Engine that tracks game state through 4 phases:
 This implements the proven V12 detection algorithm.
 """
 
-from enum import Enum, auto
+from enum import IntEnum
 from typing import List, Optional, Tuple
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+
+import numpy as np
 
 from .config import Config
-from .utils import calculate_dynamic_threshold
+from .utils import calculate_dynamic_threshold, njit
 
 
-class GameState(Enum):
+class GameState(IntEnum):
     """
     State machine states for game detection.
     
+    Plain ints under the hood so the per-frame checks in StateMachine.update
+    are integer compares; states are ordered so "clip in progress" is
+    simply state >= PROBATION.
+    
     Flow:
         SEARCHING (0) -> LOCKED (1) -> PROBATION (2) -> RALLY (3)
                   ^                          |              |
                   |__________________________|______________|
     """
-    SEARCHING = auto()    # State 0: Waiting for 2 zones to be occupied
-    LOCKED = auto()       # State 1: Measuring baseline energy for calibration
-    PROBATION = auto()    # State 2: Point started, validating minimum duration
-    RALLY = auto()        # State 3: Recording, watching for point end
+    SEARCHING = 0    # State 0: Waiting for 2 zones to be occupied
+    LOCKED = 1       # State 1: Measuring baseline energy for calibration
+    PROBATION = 2    # State 2: Point started, validating minimum duration
+    RALLY = 3        # State 3: Recording, watching for point end
 
 
-@dataclass
+@dataclass(slots=True)
 class ClipInfo:
     """
     Information about a detected clip.
@@ -50,17 +56,19 @@ class ClipInfo:
     
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
+        start = round(self.start, 3)
+        end = round(self.end, 3)
         return {
-            'start': round(self.start, 3),
-            'end': round(self.end, 3),
-            'duration': round(self.end - self.start, 3),
+            'start': start,
+            'end': end,
+            'duration': round(end - start, 3),
             'tag': self.tag,
             'confidence': self.confidence,
             'peak_energy': self.peak_energy
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StateMachineContext:
     """
     Internal state for the state machine.
@@ -73,10 +81,189 @@ class StateMachineContext:
     low_energy_frames: int = 0        # Consecutive low-energy frames
     serve_time: float = 0.0           # When serve was detected
     clip_peak_energy: float = 0.0     # Max energy during current clip
-    baseline_readings: List[float] = field(default_factory=list)
+    baseline_count: int = 0           # Baseline readings taken (SEARCHING/LOCKED)
+    baseline_sum: float = 0.0         # Running sum of those readings
     dynamic_threshold: float = 40.0   # Calibrated energy threshold
 
 
+# Plain-int states and events for the jitted core (numba treats globals as constants)
+_SEARCHING = int(GameState.SEARCHING)
+_LOCKED = int(GameState.LOCKED)
+_PROBATION = int(GameState.PROBATION)
+_RALLY = int(GameState.RALLY)
+
+EVENT_NONE = 0
+EVENT_FORCE_CUT = 1     # Players reset mid-rally: clip ends 1s ago
+EVENT_SERVE = 2         # LOCKED -> PROBATION
+EVENT_SHORT_CLIP = 3    # PROBATION ended on sustained low energy
+EVENT_RALLY_END = 4     # RALLY ended on sustained low energy
+
+
+@njit(cache=True)
+def _update_core(
+    state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+    dynamic_threshold, baseline_count, baseline_sum,
+    timestamp, active_zones, smooth_energy, num_skeletons, logic_step,
+    min_occupied_zones, frames_start_needed, frames_override_needed,
+    frames_end_needed, min_point_duration,
+    base_sensitivity, min_threshold, max_threshold
+):
+    """
+    Per-frame state transition logic (see StateMachine.update for the rules).
+    
+    Scalar-only so it compiles with numba when available.
+    
+    Returns:
+        (state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+         dynamic_threshold, baseline_count, baseline_sum, event)
+    """
+    event = EVENT_NONE
+    
+    # Track peak energy during active clips (Probation + Rally)
+    if state >= _PROBATION and smooth_energy > clip_peak_energy:
+        clip_peak_energy = smooth_energy
+    
+    # === GLOBAL OVERRIDE: Force cut if players reset during rally ===
+    # This detects when players return to serve positions mid-rally
+    # (indicates point ended and they're setting up for next serve)
+    if state == _RALLY:
+        if active_zones >= min_occupied_zones:
+            frames_held += logic_step
+            if frames_held >= frames_override_needed:
+                event = EVENT_FORCE_CUT
+                # Jump directly to LOCKED since players are already in position
+                state = _LOCKED
+                frames_held = frames_start_needed
+                baseline_count = 0
+                baseline_sum = 0.0
+        else:
+            frames_held = 0
+    
+    # === STATE: SEARCHING (State 0) ===
+    # Waiting for min 2 zones to be occupied (players in position)
+    if state == _SEARCHING:
+        if active_zones >= min_occupied_zones:
+            frames_held += logic_step
+            baseline_count += 1
+            baseline_sum += smooth_energy
+            if frames_held >= frames_start_needed:
+                state = _LOCKED
+        else:
+            frames_held = 0
+            baseline_count = 0
+            baseline_sum = 0.0
+    
+    # === STATE: LOCKED (State 1) ===
+    # Players in position, measuring baseline energy for threshold calibration
+    elif state == _LOCKED:
+        baseline_count += 1
+        baseline_sum += smooth_energy
+        
+        # Serve detected when players leave positions (zones no longer occupied)
+        if active_zones < min_occupied_zones:
+            # Calculate dynamic threshold using Safety Rails
+            dynamic_threshold = calculate_dynamic_threshold(
+                baseline_count, baseline_sum, base_sensitivity, min_threshold, max_threshold
+            )
+            event = EVENT_SERVE
+            serve_time = timestamp
+            state = _PROBATION
+            frames_held = 0
+            clip_peak_energy = 0.0
+    
+    # === STATE: PROBATION (State 2) ===
+    # Serve detected, must last > MIN_POINT_DURATION to be valid
+    # Track low energy frames during probation (same logic as RALLY state)
+    # Only cut after minimum duration AND sustained low energy
+    elif state == _PROBATION:
+        current_duration = timestamp - serve_time
+        
+        # Track low energy frames during entire probation period (same logic as RALLY)
+        above = False
+        if smooth_energy < dynamic_threshold:
+            low_energy_frames += logic_step
+        else:
+            low_energy_frames = 0  # Reset when energy goes above threshold
+            above = smooth_energy > dynamic_threshold
+        
+        # After minimum duration, check if we should cut or promote
+        if current_duration >= min_point_duration:
+            if above:
+                # Energy is high, promote to Rally (low_energy_frames already reset)
+                state = _RALLY
+            elif low_energy_frames >= frames_end_needed:
+                # Sustained low energy for min_low_energy_duration, cut it
+                event = EVENT_SHORT_CLIP
+                state = _SEARCHING
+                frames_held = 0
+                baseline_count = 0
+                baseline_sum = 0.0
+            # Otherwise, continue probation and keep counting low_energy_frames
+    
+    # === STATE: RALLY (State 3) ===
+    # Recording active rally, ends when energy drops below threshold
+    elif state == _RALLY:
+        # Occlusion Shield: If < 1 skeleton detected, HOLD state
+        # This prevents cutting when players are temporarily occluded
+        if num_skeletons < 1:
+            low_energy_frames = 0  # Reset counter, don't cut
+        else:
+            if smooth_energy < dynamic_threshold:
+                low_energy_frames += logic_step
+            else:
+                low_energy_frames = 0
+        
+        # End rally after sustained low energy
+        if low_energy_frames >= frames_end_needed:
+            event = EVENT_RALLY_END
+            state = _SEARCHING
+            frames_held = 0
+            baseline_count = 0
+            baseline_sum = 0.0
+    
+    return (state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+            dynamic_threshold, baseline_count, baseline_sum, event)
+
+
+@njit(cache=True)
+def _update_batch_core(
+    state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+    dynamic_threshold, baseline_count, baseline_sum,
+    timestamps, active_zones, smooth_energy, num_skeletons, logic_step,
+    min_occupied_zones, frames_start_needed, frames_override_needed,
+    frames_end_needed, min_point_duration,
+    base_sensitivity, min_threshold, max_threshold,
+    events, event_serve_times, event_peaks, event_thresholds
+):
+    """
+    Run _update_core over a batch of frames in one call.
+    
+    Per frame, writes the event code plus the serve time, peak energy and
+    threshold as they stood after that frame (enough to log the event and
+    build its clip afterwards).
+    
+    Returns:
+        Final (state, frames_held, low_energy_frames, serve_time,
+        clip_peak_energy, dynamic_threshold, baseline_count, baseline_sum)
+    """
+    for i in range(len(timestamps)):
+        (state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+         dynamic_threshold, baseline_count, baseline_sum, event) = _update_core(
+            state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+            dynamic_threshold, baseline_count, baseline_sum,
+            timestamps[i], active_zones[i], smooth_energy[i], num_skeletons[i], logic_step,
+            min_occupied_zones, frames_start_needed, frames_override_needed,
+            frames_end_needed, min_point_duration,
+            base_sensitivity, min_threshold, max_threshold
+        )
+        events[i] = event
+        event_serve_times[i] = serve_time
+        event_peaks[i] = clip_peak_energy
+        event_thresholds[i] = dynamic_threshold
+    return (state, frames_held, low_energy_frames, serve_time, clip_peak_energy,
+            dynamic_threshold, baseline_count, baseline_sum)
+
+
 class ClipClassifier:
     """
     Classifies clips using the "Traffic Light" tagging system.
@@ -157,6 +344,8 @@ class StateMachine:
         
         This is the core logic loop that transitions between states
         based on zone occupancy, energy levels, and skeleton visibility.
+        The transitions themselves live in _update_core (numba-compiled when
+        available); this wrapper handles logging and clip creation.
         
         Args:
             timestamp: Current video timestamp in seconds
@@ -171,150 +360,155 @@ class StateMachine:
         ctx = self.ctx
         cfg = self.config
         
-        # Track peak energy during active clips (Probation + Rally)
-        if ctx.state in [GameState.PROBATION, GameState.RALLY]:
-            ctx.clip_peak_energy = max(ctx.clip_peak_energy, smooth_energy)
+        (state, ctx.frames_held, ctx.low_energy_frames, ctx.serve_time,
+         ctx.clip_peak_energy, ctx.dynamic_threshold, ctx.baseline_count,
+         ctx.baseline_sum, event) = _update_core(
+            int(ctx.state), ctx.frames_held, ctx.low_energy_frames, ctx.serve_time,
+            ctx.clip_peak_energy, ctx.dynamic_threshold, ctx.baseline_count, ctx.baseline_sum,
+            timestamp, active_zones, smooth_energy, num_skeletons, logic_step,
+            cfg.min_occupied_zones, self.frames_start_needed, self.frames_override_needed,
+            self.frames_end_needed, cfg.min_point_duration,
+            cfg.base_sensitivity, cfg.min_dynamic_threshold, cfg.max_dynamic_threshold
+        )
+        if state != ctx.state:
+            ctx.state = GameState(state)
         
-        completed_clip = None
+        if event == EVENT_NONE:
+            return None
+        return self._handle_event(
+            event, timestamp, ctx.serve_time, ctx.clip_peak_energy, ctx.dynamic_threshold
+        )
+    
+    def update_batch(
+        self,
+        timestamps: np.ndarray,
+        active_zones: np.ndarray,
+        smooth_energy: np.ndarray,
+        num_skeletons: np.ndarray,
+        logic_step: int
+    ) -> List[ClipInfo]:
+        """
+        Process a batch of consecutive frames in one call.
         
-        # === GLOBAL OVERRIDE: Force cut if players reset during rally ===
-        # This detects when players return to serve positions mid-rally
-        # (indicates point ended and they're setting up for next serve)
-        if ctx.state == GameState.RALLY:
-            if active_zones >= cfg.min_occupied_zones:
-                ctx.frames_held += logic_step
-                if ctx.frames_held >= self.frames_override_needed:
-                    if cfg.debug_mode:
-                        print(f"🛑 FORCE CUT at {timestamp:.2f}s (players reset)")
-                    completed_clip = self._save_clip(timestamp - 1.0)
-                    # Jump directly to LOCKED since players are already in position
-                    ctx.state = GameState.LOCKED
-                    ctx.frames_held = self.frames_start_needed
-                    ctx.baseline_readings = []
-            else:
-                ctx.frames_held = 0
+        Same rules and results as calling update() once per frame, but the
+        per-frame loop runs inside _update_batch_core (numba-compiled when
+        available), so the driver pays one Python call per inference batch.
         
-        # === STATE: SEARCHING (State 0) ===
-        # Waiting for min 2 zones to be occupied (players in position)
-        if ctx.state == GameState.SEARCHING:
-            if active_zones >= cfg.min_occupied_zones:
-                ctx.frames_held += logic_step
-                ctx.baseline_readings.append(smooth_energy)
-                if ctx.frames_held >= self.frames_start_needed:
-                    ctx.state = GameState.LOCKED
-            else:
-                ctx.frames_held = 0
-                ctx.baseline_readings = []
-        
-        # === STATE: LOCKED (State 1) ===
-        # Players in position, measuring baseline energy for threshold calibration
-        elif ctx.state == GameState.LOCKED:
-            ctx.baseline_readings.append(smooth_energy)
+        Args:
+            timestamps: Video timestamps in seconds, one per frame
+            active_zones: Occupied zone counts, one per frame
+            smooth_energy: Smoothed energy values, one per frame
+            num_skeletons: Detected skeleton counts, one per frame
+            logic_step: Frame step size (for adjusting frame counters)
             
-            # Serve detected when players leave positions (zones no longer occupied)
-            if active_zones < cfg.min_occupied_zones:
-                # Calculate dynamic threshold using Safety Rails
-                ctx.dynamic_threshold = calculate_dynamic_threshold(
-                    baseline_readings=ctx.baseline_readings,
-                    base_sensitivity=cfg.base_sensitivity,
-                    min_threshold=cfg.min_dynamic_threshold,
-                    max_threshold=cfg.max_dynamic_threshold
-                )
-                
-                if cfg.debug_mode:
-                    print(f"🚀 SERVE at {timestamp:.2f}s (threshold: {ctx.dynamic_threshold:.1f})")
-                
-                ctx.serve_time = timestamp
-                ctx.state = GameState.PROBATION
-                ctx.frames_held = 0
-                ctx.clip_peak_energy = 0.0
+        Returns:
+            ClipInfo for every clip completed within the batch (in order)
+        """
+        ctx = self.ctx
+        cfg = self.config
         
-        # === STATE: PROBATION (State 2) ===
-        # Serve detected, must last > MIN_POINT_DURATION to be valid
-        # Track low energy frames during probation (same logic as RALLY state)
-        # Only cut after minimum duration AND sustained low energy
-        elif ctx.state == GameState.PROBATION:
-            current_duration = timestamp - ctx.serve_time
-            
-            # Track low energy frames during entire probation period (same logic as RALLY)
-            if smooth_energy < ctx.dynamic_threshold:
-                ctx.low_energy_frames += logic_step
-            else:
-                ctx.low_energy_frames = 0  # Reset when energy goes above threshold
-            
-            # After minimum duration, check if we should cut or promote
-            if current_duration >= cfg.min_point_duration:
-                if smooth_energy > ctx.dynamic_threshold:
-                    # Energy is high, promote to Rally
-                    ctx.state = GameState.RALLY
-                    ctx.low_energy_frames = 0
-                elif ctx.low_energy_frames >= self.frames_end_needed:
-                    # Sustained low energy for min_low_energy_duration, cut it
-                    if cfg.debug_mode:
-                        print(f"   💾 SHORT CLIP at {timestamp:.2f}s (sustained low energy)")
-                    completed_clip = self._save_clip(timestamp + cfg.post_point_buffer)
-                    ctx.state = GameState.SEARCHING
-                    ctx.frames_held = 0
-                    ctx.baseline_readings = []
-                # Otherwise, continue probation and keep counting low_energy_frames
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        n = len(timestamps)
+        events = np.empty(n, dtype=np.int64)
+        event_serve_times = np.empty(n, dtype=np.float64)
+        event_peaks = np.empty(n, dtype=np.float64)
+        event_thresholds = np.empty(n, dtype=np.float64)
         
-        # === STATE: RALLY (State 3) ===
-        # Recording active rally, ends when energy drops below threshold
-        elif ctx.state == GameState.RALLY:
-            # Occlusion Shield: If < 1 skeleton detected, HOLD state
-            # This prevents cutting when players are temporarily occluded
-            if num_skeletons < 1:
-                ctx.low_energy_frames = 0  # Reset counter, don't cut
-            else:
-                if smooth_energy < ctx.dynamic_threshold:
-                    ctx.low_energy_frames += logic_step
-                else:
-                    ctx.low_energy_frames = 0
-            
-            # End rally after sustained low energy
-            if ctx.low_energy_frames >= self.frames_end_needed:
-                if cfg.debug_mode:
-                    print(f"🎬 RALLY ENDED at {timestamp:.2f}s")
-                completed_clip = self._save_clip(timestamp + cfg.post_point_buffer)
-                ctx.state = GameState.SEARCHING
-                ctx.frames_held = 0
-                ctx.baseline_readings = []
+        (state, ctx.frames_held, ctx.low_energy_frames, ctx.serve_time,
+         ctx.clip_peak_energy, ctx.dynamic_threshold, ctx.baseline_count,
+         ctx.baseline_sum) = _update_batch_core(
+            int(ctx.state), ctx.frames_held, ctx.low_energy_frames, ctx.serve_time,
+            ctx.clip_peak_energy, ctx.dynamic_threshold, ctx.baseline_count, ctx.baseline_sum,
+            timestamps,
+            np.asarray(active_zones, dtype=np.int64),
+            np.asarray(smooth_energy, dtype=np.float64),
+            np.asarray(num_skeletons, dtype=np.int64),
+            logic_step,
+            cfg.min_occupied_zones, self.frames_start_needed, self.frames_override_needed,
+            self.frames_end_needed, cfg.min_point_duration,
+            cfg.base_sensitivity, cfg.min_dynamic_threshold, cfg.max_dynamic_threshold,
+            events, event_serve_times, event_peaks, event_thresholds
+        )
+        if state != ctx.state:
+            ctx.state = GameState(state)
+        
+        completed = []
+        for i in np.flatnonzero(events).tolist():
+            clip = self._handle_event(
+                int(events[i]), float(timestamps[i]), float(event_serve_times[i]),
+                float(event_peaks[i]), float(event_thresholds[i])
+            )
+            if clip:
+                completed.append(clip)
+        return completed
+    
+    def _handle_event(
+        self,
+        event: int,
+        timestamp: float,
+        serve_time: float,
+        peak_energy: float,
+        threshold: float
+    ) -> Optional[ClipInfo]:
+        """
+        Log a state machine event and record the clip it completes, if any.
+        
+        serve_time/peak_energy are those of the clip that just ended.
+        """
+        cfg = self.config
+        completed_clip = None
+        if event == EVENT_FORCE_CUT:
+            if cfg.debug_mode:
+                print(f"🛑 FORCE CUT at {timestamp:.2f}s (players reset)")
+            completed_clip = self._save_clip(timestamp - 1.0, serve_time, peak_energy)
+        elif event == EVENT_SERVE:
+            if cfg.debug_mode:
+                print(f"🚀 SERVE at {timestamp:.2f}s (threshold: {threshold:.1f})")
+        elif event == EVENT_SHORT_CLIP:
+            if cfg.debug_mode:
+                print(f"   💾 SHORT CLIP at {timestamp:.2f}s (sustained low energy)")
+            completed_clip = self._save_clip(timestamp + cfg.post_point_buffer, serve_time, peak_energy)
+        elif event == EVENT_RALLY_END:
+            if cfg.debug_mode:
+                print(f"🎬 RALLY ENDED at {timestamp:.2f}s")
+            completed_clip = self._save_clip(timestamp + cfg.post_point_buffer, serve_time, peak_energy)
         
         if completed_clip:
             self.clips.append(completed_clip)
         
         return completed_clip
     
-    def _save_clip(self, end_time: float) -> ClipInfo:
+    def _save_clip(self, end_time: float, serve_time: float, peak_energy: float) -> ClipInfo:
         """
-        Create a ClipInfo for the current clip.
+        Create a ClipInfo for a finished clip.
         
         Applies PRE_SERVE_BUFFER to start time and classifies using
         Traffic Light system.
         
         Args:
             end_time: Raw end timestamp (POST_POINT_BUFFER already added by caller)
+            serve_time: When the clip's serve was detected
+            peak_energy: Maximum smoothed energy during the clip
             
         Returns:
             ClipInfo with all metadata
         """
-        ctx = self.ctx
         cfg = self.config
         
         # Apply pre-serve buffer (critical for capturing setup)
-        clip_start = max(0, ctx.serve_time - cfg.pre_serve_buffer)
+        clip_start = max(0, serve_time - cfg.pre_serve_buffer)
         clip_end = end_time
         duration = clip_end - clip_start
         
         # Classify using Traffic Light system
-        tag, confidence = self.classifier.classify(duration, ctx.clip_peak_energy)
+        tag, confidence = self.classifier.classify(duration, peak_energy)
         
         return ClipInfo(
             start=clip_start,
             end=clip_end,
             tag=tag,
             confidence=confidence,
-            peak_energy=int(ctx.clip_peak_energy)
+            peak_energy=int(peak_energy)
         )
     
     def reset(self) -> None:
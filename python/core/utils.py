@@ -6,11 +6,50 @@ Contains energy calculation, zone management, and helper functions.
 import json
 import cv2
 import numpy as np
-from typing import List, Tuple, Optional
+from scipy.optimize import linear_sum_assignment
+from scipy.signal import lfilter
+from typing import Any, List, Sequence, Tuple, Optional
 from dataclasses import dataclass
 
 from .config import Config
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # numba is optional; jitted helpers run as plain Python
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports @njit and @njit(...))."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:  # orjson is optional; falls back to the stdlib json module
+    HAS_ORJSON = False
+
+
+def load_json(filename: str) -> Any:
+    """Read a JSON file (parsed with orjson when installed)."""
+    if HAS_ORJSON:
+        with open(filename, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def save_json(data: Any, filename: str) -> None:
+    """Write data as 2-space indented JSON (serialized with orjson when installed)."""
+    if HAS_ORJSON:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=2)
+
 
 @dataclass
 class ZoneStatus:
@@ -32,6 +71,12 @@ class ZoneManager:
         self.zones: List[np.ndarray] = []
         self.scaled_zones: List[np.ndarray] = []
         self.scale_factor: float = 1.0
+        # Flattened copy of the active zones for points_in_polygons:
+        # zone k is zones_flat[zone_offsets[k]:zone_offsets[k + 1]], with
+        # axis-aligned bounds zone_bounds[k] = (xmin, ymin, xmax, ymax)
+        self.zones_flat: np.ndarray = np.empty((0, 2), dtype=np.float32)
+        self.zone_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.zone_bounds: np.ndarray = np.empty((0, 4), dtype=np.float32)
     
     def load_zones(self, filename: str) -> None:
         """
@@ -40,9 +85,11 @@ class ZoneManager:
         Args:
             filename: Path to JSON file containing zone polygon coordinates
         """
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        self.zones = [np.array(zone, dtype=np.int32) for zone in data]
+        data = load_json(filename)
+        # One int32 vertex buffer for all zones; each zone is a view into it
+        flat = np.array([pt for zone in data for pt in zone], dtype=np.int32).reshape(-1, 2)
+        self.zones = self._split_zones(flat, [len(zone) for zone in data])
+        self._update_zone_cache()
         if self.config.debug_mode:
             print(f"✅ Loaded {len(self.zones)} zones from {filename}")
     
@@ -55,34 +102,116 @@ class ZoneManager:
             target_width: Width of processed frame (after downscaling)
         """
         self.scale_factor = target_width / original_width
-        self.scaled_zones = [
-            (zone * self.scale_factor).astype(np.int32) 
-            for zone in self.zones
-        ]
+        if not self.zones:
+            self.scaled_zones = []
+        else:
+            # Scale all vertices in one pass, then split back into per-zone views
+            scaled = (np.concatenate(self.zones) * self.scale_factor).astype(np.int32)
+            self.scaled_zones = self._split_zones(scaled, [len(zone) for zone in self.zones])
+        self._update_zone_cache()
+    
+    @staticmethod
+    def _split_zones(flat: np.ndarray, counts: List[int]) -> List[np.ndarray]:
+        """Split a (V, 2) vertex buffer into per-zone views of the given vertex counts."""
+        if not counts:
+            return []
+        return np.split(flat, np.cumsum(counts)[:-1])
+    
+    def _active_zones(self) -> List[np.ndarray]:
+        """Zones that ankles are checked against (scaled when available)."""
+        return self.scaled_zones if self.scaled_zones else self.zones
     
-    def check_occupancy(self, ankles: List[Tuple[float, float]]) -> ZoneStatus:
+    def _update_zone_cache(self) -> None:
+        """Rebuild the flattened polygons and bounding boxes of the active zones."""
+        zones = [zone.reshape(-1, 2) for zone in self._active_zones()]
+        if not zones:
+            self.zones_flat = np.empty((0, 2), dtype=np.float32)
+            self.zone_offsets = np.zeros(1, dtype=np.int64)
+            self.zone_bounds = np.empty((0, 4), dtype=np.float32)
+            return
+        self.zones_flat = np.concatenate(zones).astype(np.float32)
+        self.zone_offsets = np.cumsum([0] + [len(zone) for zone in zones]).astype(np.int64)
+        self.zone_bounds = np.array(
+            [np.concatenate([zone.min(axis=0), zone.max(axis=0)]) for zone in zones],
+            dtype=np.float32
+        )
+    
+    def check_occupancy(self, ankles: np.ndarray) -> ZoneStatus:
         """
         Check which zones are occupied by player ankles.
         
         Args:
-            ankles: List of (x, y) ankle positions from pose detection
+            ankles: (N, 2) array of (x, y) ankle positions from pose detection
             
         Returns:
             ZoneStatus with count of occupied zones and per-zone occupancy list
         """
-        zones_to_check = self.scaled_zones if self.scaled_zones else self.zones
+        zones_to_check = self._active_zones()
+        
+        if HAS_NUMBA:
+            # One compiled call per frame: bbox cull + crossing-number test
+            occupied = points_in_polygons(
+                np.ascontiguousarray(ankles, dtype=np.float32),
+                self.zones_flat, self.zone_offsets, self.zone_bounds
+            ).tolist()
+            return ZoneStatus(active_count=sum(occupied), occupancy=occupied)
+        
         occupied = [False] * len(zones_to_check)
         
-        for ankle in ankles:
-            for i, zone in enumerate(zones_to_check):
-                if self._point_in_zone(ankle, zone):
-                    occupied[i] = True
+        if len(ankles) > 0 and zones_to_check:
+            # Bounding-box prefilter for all (zone, ankle) pairs at once: (K, N)
+            x = ankles[:, 0]
+            y = ankles[:, 1]
+            b = self.zone_bounds
+            in_box = (
+                (x >= b[:, 0:1]) & (x <= b[:, 2:3]) &
+                (y >= b[:, 1:2]) & (y <= b[:, 3:4])
+            )
+            
+            # Exact polygon test only for candidates, stopping at the first hit
+            for i in np.flatnonzero(in_box.any(axis=1)).tolist():
+                zone = zones_to_check[i]
+                occupied[i] = any(
+                    self._point_in_zone(ankle, zone)
+                    for ankle in ankles[in_box[i]].tolist()
+                )
         
         return ZoneStatus(
             active_count=sum(occupied),
             occupancy=occupied
         )
     
+    def check_occupancy_batch(self, ankles_per_frame: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Check zone occupancy for a whole batch of frames at once.
+        
+        With numba the batch is flattened and tested in one compiled call;
+        otherwise this falls back to check_occupancy per frame.
+        
+        Args:
+            ankles_per_frame: One (N_i, 2) ankle array per frame
+            
+        Returns:
+            (B, K) bool array of per-frame, per-zone occupancy
+        """
+        num_frames = len(ankles_per_frame)
+        num_zones = len(self.zone_bounds)
+        if num_frames == 0:
+            return np.zeros((0, num_zones), dtype=np.bool_)
+        
+        if HAS_NUMBA:
+            points_flat = np.concatenate(ankles_per_frame).astype(np.float32, copy=False)
+            point_offsets = np.zeros(num_frames + 1, dtype=np.int64)
+            np.cumsum([len(a) for a in ankles_per_frame], out=point_offsets[1:])
+            return points_in_polygons_batch(
+                points_flat, point_offsets, self.zones_flat, self.zone_offsets, self.zone_bounds
+            )
+        
+        return np.array(
+            [self.check_occupancy(ankles).occupancy for ankles in ankles_per_frame],
+            dtype=np.bool_
+        ).reshape(num_frames, num_zones)
+    
     @staticmethod
     def _point_in_zone(point: Tuple[float, float], zone_contour: np.ndarray) -> bool:
         """
@@ -103,16 +232,35 @@ class EnergyCalculator:
     Calculates movement energy by tracking skeleton displacement between frames.
     
     Energy is computed as total pixel displacement of hip centers between consecutive
-    frames, using greedy matching to pair skeletons. Values are normalized back to
-    original resolution when processing downscaled frames.
+    frames, using optimal (Hungarian) matching to pair skeletons. Values are normalized
+    back to original resolution when processing downscaled frames.
     """
     
+    # Initial previous-frame buffer size (players + a few bystanders)
+    INITIAL_CAPACITY = 8
+    
     def __init__(self, config: Config):
         self.config = config
-        self.prev_skeletons: List[Tuple[float, float]] = []
+        # Previous frame's hip centers, copied into a persistent buffer (grown
+        # on demand) since detection arrays may be views into reused memory
+        self._prev = np.empty((self.INITIAL_CAPACITY, 2), dtype=np.float32)
+        self._prev_n = 0
         self.smooth_energy: float = 0.0
         self.scale_factor: float = 1.0
     
+    @property
+    def prev_skeletons(self) -> np.ndarray:
+        """(N, 2) view of the previous frame's hip centers."""
+        return self._prev[:self._prev_n]
+    
+    def _store_prev(self, skeletons: np.ndarray) -> None:
+        """Copy this frame's hip centers into the persistent previous-frame buffer."""
+        n = len(skeletons)
+        if n > len(self._prev):
+            self._prev = np.empty((max(n, 2 * len(self._prev)), 2), dtype=np.float32)
+        np.copyto(self._prev[:n], skeletons, casting='same_kind')
+        self._prev_n = n
+    
     def set_scale_factor(self, scale_factor: float) -> None:
         """
         Set scale factor for normalizing energy to original resolution.
@@ -122,44 +270,37 @@ class EnergyCalculator:
         """
         self.scale_factor = scale_factor
     
-    def calculate(self, current_skeletons: List[Tuple[float, float]]) -> float:
+    def calculate(self, current_skeletons: np.ndarray) -> float:
         """
         Calculate raw movement energy between current and previous frame.
         
-        Uses greedy matching to pair skeletons between frames, then sums
-        the total displacement of matched pairs.
+        Uses optimal assignment (scipy's linear_sum_assignment) to pair
+        skeletons between frames, then sums the total displacement of matched pairs.
         
         Args:
-            current_skeletons: List of (cx, cy) hip center positions
+            current_skeletons: (N, 2) array of (cx, cy) hip center positions
             
         Returns:
             Raw energy value (total pixel displacement, normalized to original resolution)
         """
-        if not self.prev_skeletons or not current_skeletons:
-            self.prev_skeletons = current_skeletons
+        if self._prev_n == 0 or len(current_skeletons) == 0:
+            self._store_prev(current_skeletons)
             return 0.0
         
-        total_movement = 0.0
-        used_indices = set()
-        max_dist = self.config.max_skeleton_match_distance
+        # Pairwise hip-center distances (current x previous) in one shot
+        diff = current_skeletons[:, None, :] - self.prev_skeletons[None, :, :]
+        dists = np.sqrt((diff * diff).sum(axis=2))
         
-        for curr in current_skeletons:
-            min_dist = float('inf')
-            best_match = None
-            
-            for i, prev in enumerate(self.prev_skeletons):
-                if i in used_indices:
-                    continue
-                dist = np.linalg.norm(np.array(curr) - np.array(prev))
-                if dist < max_dist and dist < min_dist:
-                    min_dist = dist
-                    best_match = i
-            
-            if best_match is not None:
-                total_movement += min_dist
-                used_indices.add(best_match)
+        # Optimal one-to-one matching (minimum total displacement). Pairs too
+        # far apart to be the same player get a prohibitive cost so they are
+        # only chosen when unavoidable, then dropped from the sum.
+        max_dist = self.config.max_skeleton_match_distance
+        costs = np.where(dists < max_dist, dists, max_dist * 10)
+        rows, cols = linear_sum_assignment(costs)
+        matched = dists[rows, cols]
+        total_movement = float(matched[matched < max_dist].sum())
         
-        self.prev_skeletons = current_skeletons
+        self._store_prev(current_skeletons)
         
         # Normalize to original resolution if processing at reduced size
         if self.scale_factor != 1.0:
@@ -184,15 +325,173 @@ class EnergyCalculator:
         self.smooth_energy = (raw_energy * alpha) + (self.smooth_energy * (1 - alpha))
         return self.smooth_energy
     
+    def calculate_batch(self, skeletons_per_frame: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Raw energy for consecutive frames (see calculate).
+        
+        Args:
+            skeletons_per_frame: One (N_i, 2) hip-center array per frame, in order
+            
+        Returns:
+            (B,) float64 raw energies
+        """
+        return np.array([self.calculate(s) for s in skeletons_per_frame], dtype=np.float64)
+    
+    def update_smooth_batch(self, raw_energies: np.ndarray) -> np.ndarray:
+        """
+        Exponential smoothing over consecutive raw energies (see update_smooth).
+        
+        Args:
+            raw_energies: (B,) raw energies, in frame order
+            
+        Returns:
+            (B,) smoothed energies; smooth_energy is left at the last value
+        """
+        raw_energies = np.asarray(raw_energies, dtype=np.float64)
+        alpha = self.config.energy_smoothing_factor
+        if HAS_NUMBA:
+            smoothed = exponential_smooth(raw_energies, alpha, self.smooth_energy)
+        else:
+            # Same recurrence as a first-order IIR filter, in one C call:
+            # y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], seeded with smooth_energy
+            smoothed, _ = lfilter(
+                [alpha], [1.0, alpha - 1.0], raw_energies,
+                zi=[(1 - alpha) * self.smooth_energy]
+            )
+        if len(smoothed):
+            self.smooth_energy = float(smoothed[-1])
+        return smoothed
+    
     def reset(self) -> None:
         """Reset calculator state for new video or clip."""
-        self.prev_skeletons = []
+        self._prev_n = 0
         self.smooth_energy = 0.0
 
 
+@njit(cache=True)
+def points_in_polygons(
+    points: np.ndarray,
+    zones_flat: np.ndarray,
+    zone_offsets: np.ndarray,
+    zone_bounds: np.ndarray
+) -> np.ndarray:
+    """
+    Test which polygons contain at least one of the points.
+    
+    Per polygon, points outside its bounding box are culled, then a
+    crossing-number (ray casting) test runs over its edges. Points exactly on
+    an edge count as inside, matching cv2.pointPolygonTest(...) >= 0.
+    Inputs are stored as float32; the edge math runs in float64 (as OpenCV
+    does) so on-edge and crossing decisions are exact for integer vertices.
+    
+    Args:
+        points: (N, 2) float32 (x, y) points
+        zones_flat: (V, 2) float32 vertices of all polygons, concatenated
+        zone_offsets: (K + 1,) int64; polygon k is zones_flat[offsets[k]:offsets[k + 1]]
+        zone_bounds: (K, 4) float32 (xmin, ymin, xmax, ymax) per polygon
+        
+    Returns:
+        (K,) bool array, True where a polygon contains any point
+    """
+    num_zones = len(zone_offsets) - 1
+    occupied = np.zeros(num_zones, dtype=np.bool_)
+    
+    for k in range(num_zones):
+        start = zone_offsets[k]
+        end = zone_offsets[k + 1]
+        
+        for p in range(points.shape[0]):
+            px = np.float64(points[p, 0])
+            py = np.float64(points[p, 1])
+            if (px < zone_bounds[k, 0] or px > zone_bounds[k, 2]
+                    or py < zone_bounds[k, 1] or py > zone_bounds[k, 3]):
+                continue
+            
+            inside = False
+            j = end - 1
+            for i in range(start, end):
+                xi = np.float64(zones_flat[i, 0])
+                yi = np.float64(zones_flat[i, 1])
+                xj = np.float64(zones_flat[j, 0])
+                yj = np.float64(zones_flat[j, 1])
+                
+                # On the edge (collinear and within the segment's extent)
+                if ((px - xi) * (yj - yi) == (py - yi) * (xj - xi)
+                        and min(xi, xj) <= px <= max(xi, xj)
+                        and min(yi, yj) <= py <= max(yi, yj)):
+                    inside = True
+                    break
+                
+                # Edge straddles the horizontal ray through the point
+                if (yi > py) != (yj > py):
+                    if px < xi + (py - yi) * (xj - xi) / (yj - yi):
+                        inside = not inside
+                j = i
+            
+            if inside:
+                occupied[k] = True
+                break
+    
+    return occupied
+
+
+@njit(cache=True)
+def points_in_polygons_batch(
+    points_flat: np.ndarray,
+    point_offsets: np.ndarray,
+    zones_flat: np.ndarray,
+    zone_offsets: np.ndarray,
+    zone_bounds: np.ndarray
+) -> np.ndarray:
+    """
+    Run points_in_polygons for every frame of a batch.
+    
+    Args:
+        points_flat: (P, 2) float32 points of all frames, concatenated
+        point_offsets: (B + 1,) int64; frame f is points_flat[offsets[f]:offsets[f + 1]]
+        zones_flat, zone_offsets, zone_bounds: As in points_in_polygons
+        
+    Returns:
+        (B, K) bool occupancy
+    """
+    num_frames = len(point_offsets) - 1
+    occupied = np.zeros((num_frames, len(zone_offsets) - 1), dtype=np.bool_)
+    for f in range(num_frames):
+        occupied[f] = points_in_polygons(
+            points_flat[point_offsets[f]:point_offsets[f + 1]],
+            zones_flat, zone_offsets, zone_bounds
+        )
+    return occupied
+
+
+@njit(cache=True)
+def exponential_smooth(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    Exponential moving average: s[i] = alpha * values[i] + (1 - alpha) * s[i - 1].
+    
+    Args:
+        values: (B,) float64 inputs
+        alpha: Smoothing factor (weight of the newest value)
+        initial: Smoothed value before values[0]
+        
+    Returns:
+        (B,) float64 smoothed values
+    """
+    smoothed = np.empty_like(values)
+    s = initial
+    for i in range(len(values)):
+        s = (values[i] * alpha) + (s * (1 - alpha))
+        smoothed[i] = s
+    return smoothed
+
+
+@njit(cache=True, inline='always')
 def clamp(value: float, min_val: float, max_val: float) -> float:
     """
-    Clamp a value between min and max bounds.
+    Clamp a scalar between min and max bounds (use np.clip for arrays).
+    
+    Inlined into jitted callers; plain comparisons keep the pure-Python
+    fallback free of min()/max() calls.
     
     Args:
         value: Value to clamp
@@ -202,11 +501,17 @@ def clamp(value: float, min_val: float, max_val: float) -> float:
     Returns:
         Clamped value
     """
-    return max(min_val, min(value, max_val))
+    if value > max_val:
+        value = max_val
+    if value < min_val:
+        value = min_val
+    return value
 
 
+@njit(cache=True)
 def calculate_dynamic_threshold(
-    baseline_readings: List[float],
+    baseline_count: int,
+    baseline_sum: float,
     base_sensitivity: float,
     min_threshold: float,
     max_threshold: float
@@ -214,6 +519,9 @@ def calculate_dynamic_threshold(
     """
     Calculate dynamic energy threshold from baseline readings.
     
+    Takes running totals rather than the readings themselves, so callers
+    accumulate in O(1) memory per frame.
+    
     This implements the "Safety Rails" auto-calibration:
     - Floor: Threshold never drops below min_threshold (fixes "Super Still" issue)
     - Ceiling: Threshold never exceeds max_threshold (fixes "Jittery Setup" issue)
@@ -221,7 +529,8 @@ def calculate_dynamic_threshold(
     Formula: Threshold = Clamp(Noise_Floor + base_sensitivity, min_threshold, max_threshold)
     
     Args:
-        baseline_readings: Energy readings collected during LOCKED state
+        baseline_count: Number of energy readings collected during LOCKED state
+        baseline_sum: Sum of those readings
         base_sensitivity: Amount to add above noise floor
         min_threshold: Minimum allowed threshold (floor)
         max_threshold: Maximum allowed threshold (ceiling)
@@ -229,8 +538,8 @@ def calculate_dynamic_threshold(
     Returns:
         Calibrated dynamic threshold
     """
-    if baseline_readings:
-        noise_floor = sum(baseline_readings) / len(baseline_readings)
+    if baseline_count > 0:
+        noise_floor = baseline_sum / baseline_count
     else:
         noise_floor = 10.0  # Fallback for empty readings
     
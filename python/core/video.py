@@ -0,0 +1,114 @@
+"""
+GPU video decoding for Roundnet Condenser.
+
+Decodes with NVDEC straight into CUDA tensors so frames skip the
+CPU decode -> resize -> host-to-device upload path before inference.
+Optional: requires torchcodec built with CUDA support. Callers fall back
+to cv2.VideoCapture when it is unavailable.
+"""
+
+import math
+from typing import Iterator, Tuple
+
+import torch
+import torch.nn.functional as F
+
+
+class GPUFrameSource:
+    """
+    NVDEC-backed frame source that yields frames already resident on the GPU.
+
+    Mirrors the CPU reader in main.py: every `logic_step`-th frame is kept,
+    resized to (width, height) and tagged with (frame_idx, timestamp).
+    Frames are zero-padded at the bottom to a multiple of the model stride
+    (PoseDetector.detect_batch pads the width too) so keypoints stay in
+    processed-frame pixels.
+    """
+
+    STRIDE = 32
+
+    def __init__(
+        self,
+        video_path: str,
+        fps: float,
+        width: int,
+        height: int,
+        logic_step: int,
+        batch_size: int = 4
+    ):
+        """
+        Open the video on the GPU decoder.
+
+        Args:
+            video_path: Path to the source video
+            fps: Source FPS (used for timestamps, same as the CPU reader)
+            width: Target (processed) frame width
+            height: Target (processed) frame height
+            logic_step: Keep every Nth frame (same meaning as in process_video)
+            batch_size: Frames decoded per NVDEC request
+        """
+        from torchcodec.decoders import VideoDecoder
+
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.logic_step = max(1, logic_step)
+        self.batch_size = max(1, batch_size)
+        self.decoder = VideoDecoder(video_path, device='cuda')
+
+        self.num_frames = self._frame_count(self.decoder.metadata, fps)
+        self.pad_bottom = math.ceil(height / self.STRIDE) * self.STRIDE - height
+
+    @staticmethod
+    def is_available() -> bool:
+        """True if a CUDA device and torchcodec are both present."""
+        if not torch.cuda.is_available():
+            return False
+        try:
+            import torchcodec.decoders  # noqa: F401
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _frame_count(metadata, fps: float) -> int:
+        """
+        Number of frames in the stream.
+
+        Uses the container's frame count, else estimates it from duration x
+        average fps (rounded down: asking NVDEC for a frame past the end fails).
+        Raises ValueError when neither is known, so the caller falls back to
+        the CPU reader instead of decoding nothing.
+        """
+        if metadata.num_frames:
+            return int(metadata.num_frames)
+        rate = metadata.average_fps or fps
+        if metadata.duration_seconds and rate:
+            return math.floor(metadata.duration_seconds * rate)
+        raise ValueError("video has no frame count or duration in its metadata")
+
+    def _resize(self, batch: torch.Tensor) -> torch.Tensor:
+        """Resize a (B, 3, H, W) uint8 batch to the processed size, padded to the stride."""
+        if batch.shape[-2:] != (self.height, self.width):
+            batch = F.interpolate(
+                batch.float(), size=(self.height, self.width),
+                mode='bilinear', align_corners=False
+            ).round_().clamp_(0, 255).to(torch.uint8)
+        if self.pad_bottom:
+            batch = F.pad(batch, (0, 0, 0, self.pad_bottom))
+        return batch
+
+    def frames(self) -> Iterator[Tuple[Tuple[int, float], torch.Tensor]]:
+        """
+        Yield ((frame_idx, timestamp), frame) for every processed frame.
+
+        frame is a (3, H_padded, width) uint8 RGB CUDA tensor; frame_idx is
+        1-based to match the CPU reader.
+        """
+        kept = range(self.logic_step - 1, self.num_frames, self.logic_step)
+        for i in range(0, len(kept), self.batch_size):
+            indices = list(kept[i:i + self.batch_size])
+            batch = self._resize(self.decoder.get_frames_at(indices=indices).data)
+            for idx, frame in zip(indices, batch):
+                frame_idx = idx + 1
+                yield (frame_idx, frame_idx / self.fps), frame
@@ -10,6 +10,7 @@ Usage:
     python main.py video.mp4 -o clips.json      # Custom output
     python main.py video.mp4 --preview          # Show debug overlay
     python main.py video.mp4 --fast             # Fast mode (lower accuracy)
+    python main.py a.mp4 b.mp4 --jobs 2         # Several videos in parallel
 
 Output Format (clips.json):
     {
@@ -24,14 +25,19 @@ Output Format (clips.json):
 """
 
 import argparse
-import json
+import multiprocessing
 import sys
 import time
 import cv2
+import numpy as np
+from contextlib import closing
 from pathlib import Path
 from datetime import datetime
 
-from core import Config, PoseDetector, EnergyCalculator, StateMachine, ZoneManager
+from core import (
+    Config, PoseDetector, EnergyCalculator, StateMachine, ZoneManager, GPUFrameSource,
+    process_videos, save_json
+)
 from tools.visualizer import Visualizer
 
 
@@ -54,6 +60,9 @@ Examples:
   %(prog)s game.mp4 --fast
       Process faster (skips more frames, lower accuracy)
 
+  %(prog)s game1.mp4 game2.mp4 --jobs 2
+      Process several videos in parallel (writes game1_clips.json, game2_clips.json)
+
 Workflow:
   1. First, draw zones: python -m tools.zone_wizard_poly video.mp4
   2. Then process: python main.py video.mp4
@@ -63,8 +72,10 @@ Workflow:
     
     # Required arguments
     parser.add_argument(
-        "video",
-        help="Path to input video file"
+        "videos",
+        nargs="+",
+        metavar="video",
+        help="Path to input video file (several videos are processed in parallel)"
     )
     
     # File options
@@ -76,7 +87,8 @@ Workflow:
     parser.add_argument(
         "-o", "--output",
         default="clips.json",
-        help="Output JSON file path (default: clips.json)"
+        help="Output JSON file path (default: clips.json); with several videos, "
+             "each writes <video>_<output> next to it"
     )
     parser.add_argument(
         "-m", "--model",
@@ -108,6 +120,22 @@ Workflow:
         default=4,
         help="Inference batch size for GPU throughput (default: 4)"
     )
+    parser.add_argument(
+        "--int8-data",
+        default="",
+        help="Dataset YAML for INT8 TensorRT calibration (CUDA only; default: FP16 engine)"
+    )
+    parser.add_argument(
+        "--cpu-decode",
+        action="store_true",
+        help="Always decode on the CPU (default: NVDEC via torchcodec when CUDA is available)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=2,
+        help="Videos processed in parallel when several are given (default: 2)"
+    )
 
     # Visualization options
     parser.add_argument(
@@ -115,6 +143,12 @@ Workflow:
         action="store_true",
         help="Show preview window during processing (press 'q' to quit)"
     )
+    parser.add_argument(
+        "--preview-scale",
+        type=float,
+        default=None,
+        help="Draw the preview overlay at this fraction of the frame size (default: from config.py)"
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -150,8 +184,8 @@ Workflow:
     return parser.parse_args()
 
 
-def create_config(args) -> Config:
-    """Create configuration from command line arguments.
+def create_config(args, video: str, output: str) -> Config:
+    """Create configuration for one video from command line arguments.
     
     Config.py is the source of truth. Command-line arguments only override
     if explicitly provided (not None).
@@ -160,18 +194,21 @@ def create_config(args) -> Config:
     config_defaults = Config()
     
     config = Config(
-        video_path=args.video,
+        video_path=video,
         zones_file=args.zones,
-        output_json=args.output,
+        output_json=output,
         model_path=args.model,
         process_width=args.width,
         skip_frames=args.skip if not args.fast else 4,
         inference_batch_size=args.batch,
+        int8_calibration_data=args.int8_data,
+        gpu_decode=not args.cpu_decode,
         # Use config.py defaults unless explicitly overridden via CLI
         pre_serve_buffer=args.pre_buffer if args.pre_buffer is not None else config_defaults.pre_serve_buffer,
         post_point_buffer=args.post_buffer if args.post_buffer is not None else config_defaults.post_point_buffer,
         min_occupied_zones=args.min_zones,
         show_visuals=args.preview,
+        preview_scale=args.preview_scale if args.preview_scale is not None else config_defaults.preview_scale,
         debug_mode=args.debug and not args.quiet
     )
     return config
@@ -193,8 +230,7 @@ def process_video(config: Config) -> dict:
     zone_mgr = ZoneManager(config)
     visualizer = Visualizer(config) if config.show_visuals else None
     
-    # Load model and zones
-    detector.load_model()
+    # Load zones (the model is loaded once the processed frame size is known)
     zone_mgr.load_zones(config.zones_file)
     
     # Open video
@@ -212,6 +248,9 @@ def process_video(config: Config) -> dict:
     scale_factor = config.process_width / original_width
     new_height = int(original_height * scale_factor)
     
+    # Build the model (TensorRT engine / CUDA graph) for the processed frame size
+    detector.load_model((new_height, config.process_width))
+    
     # Scale zones and configure energy calculator
     zone_mgr.scale_zones(original_width, config.process_width)
     energy_calc.set_scale_factor(scale_factor)
@@ -224,6 +263,30 @@ def process_video(config: Config) -> dict:
     # Initialize state machine
     state_machine = StateMachine(config, fps)
     
+    # NVDEC path: frames are decoded and resized on the GPU (no CPU frames to preview).
+    # Falls back to cv2.VideoCapture when unavailable or the codec is unsupported.
+    gpu_source = None
+    if (config.gpu_decode
+            and not config.show_visuals
+            and detector.get_device() == 'cuda'
+            and GPUFrameSource.is_available()):
+        try:
+            gpu_source = GPUFrameSource(
+                config.video_path, fps, config.process_width, new_height,
+                logic_step, config.inference_batch_size
+            )
+        except Exception as e:
+            if config.debug_mode:
+                print(f"⚠️ GPU decode unavailable for this video, using CPU: {e}")
+    
+    # With CUDA inference, CPU-decoded frames are resized on the GPU (see
+    # PoseDetector._upload_batch); previews still need the small frame on the CPU
+    resize_on_gpu = (
+        config.gpu_resize
+        and not config.show_visuals
+        and detector.get_device() == 'cuda'
+    )
+    
     if config.debug_mode:
         print(f"\n{'='*60}")
         print(f"⚡ ROUNDNET CONDENSER")
@@ -234,56 +297,92 @@ def process_video(config: Config) -> dict:
         print(f"   Process FPS: {config.process_fps} (every {logic_step} frames → ~{effective_logic_fps:.1f} logic/s)")
         print(f"   Batch size: {config.inference_batch_size}")
         print(f"   Device: {detector.get_device().upper()}")
+        decode = 'GPU (NVDEC)' if gpu_source else ('CPU + GPU resize' if resize_on_gpu else 'CPU')
+        print(f"   Decode: {decode}")
         print(f"   Zones: {len(zone_mgr.zones)}")
         print(f"{'='*60}\n")
 
-    start_time = time.time()
-    frame_idx = 0
-    batch_size = config.inference_batch_size
-    batch: list = []  # (frame_idx, timestamp, small_frame)
-
-    # Main processing loop
-    while True:
-        ret, frame = cap.read()
-
-        if ret:
-            frame_idx += 1
-
-            # Skip frames for speed (process 1, skip N)
-            if frame_idx % logic_step != 0:
+    def read_frames():
+        """
+        Decode every logic_step-th frame as ((frame_idx, timestamp), small_frame).
+        
+        Iterated on detect_stream's producer thread, so decode + resize overlap
+        inference (OpenCV releases the GIL inside grab/read/resize). With
+        resize_on_gpu the full-size frame is passed on instead.
+        """
+        # Reusable resize outputs: a frame's buffer is only rewritten once
+        # detect_stream can no longer be holding it
+        if not resize_on_gpu:
+            ring = [
+                np.empty((new_height, config.process_width, 3), dtype=np.uint8)
+                for _ in range(detector.max_frames_in_flight())
+            ]
+            slot = 0
+
+        # Timestamps of every source frame, indexed by 1-based frame_idx
+        # (CAP_PROP_FRAME_COUNT can undercount, so compute past the end)
+        frame_times = np.arange(max(total_frames, 0) + 1, dtype=np.float64) / fps
+        num_times = len(frame_times)
+
+        frame_idx = 0
+        while True:
+            # Skip frames for speed (process 1, skip N): the logic_step - 1 frames
+            # before each kept one only need grab(), which advances the decoder
+            # without the color conversion + copy that retrieve() does.
+            for _ in range(logic_step - 1):
+                if not cap.grab():
+                    return
+            frame_idx += logic_step
+
+            ret, frame = cap.read()
+            if not ret:
+                return
+
+            timestamp = frame_times[frame_idx] if frame_idx < num_times else frame_idx / fps
+            if resize_on_gpu:
+                yield (frame_idx, timestamp), frame
                 continue
-
-            timestamp = frame_idx / fps
-            small_frame = cv2.resize(frame, (config.process_width, new_height))
-            batch.append((frame_idx, timestamp, small_frame))
-
-        # Process batch when full, or when at end of video with a partial batch
-        if len(batch) >= batch_size or (not ret and batch):
-            frames = [item[2] for item in batch]
-            detections = detector.detect_batch(frames)
-
-            user_quit = False
-            for (fi, ts, sf), detection in zip(batch, detections):
-                zone_status = zone_mgr.check_occupancy(detection.ankles)
-                raw_energy = energy_calc.calculate(detection.skeletons)
-                smooth_energy = energy_calc.update_smooth(raw_energy)
-
-                state_machine.update(
-                    timestamp=ts,
-                    active_zones=zone_status.active_count,
-                    smooth_energy=smooth_energy,
-                    num_skeletons=len(detection.skeletons),
-                    logic_step=logic_step
-                )
-
-                # Visualization (debug overlay)
-                if config.show_visuals and visualizer:
+            small_frame = cv2.resize(frame, (config.process_width, new_height), dst=ring[slot])
+            slot = (slot + 1) % len(ring)
+            yield (frame_idx, timestamp), small_frame
+
+    frames = gpu_source.frames() if gpu_source else read_frames()
+
+    start_time = time.monotonic()
+    last_progress_frame = 0
+
+    # Main processing loop: decode and inference run on background threads
+    # (see PoseDetector.detect_stream); this thread runs zone/energy/state logic.
+    with closing(detector.detect_stream(frames)) as stream:
+        user_quit = False
+        for tags, small_frames, detections in stream:
+            # Zone/energy post-processing for the whole batch at once
+            occupancy = zone_mgr.check_occupancy_batch([d.ankles for d in detections])
+            active_zones = occupancy.sum(axis=1)
+            raw_energies = energy_calc.calculate_batch([d.skeletons for d in detections])
+            smooth_energies = energy_calc.update_smooth_batch(raw_energies)
+            num_skeletons = np.array([len(d.skeletons) for d in detections], dtype=np.int64)
+            # tags are (frame_idx, timestamp); one conversion gives both columns
+            frame_ids, timestamps = np.array(tags, dtype=np.float64).T
+
+            # Visualization (debug overlay) needs the state after every frame,
+            # so step the state machine per frame; otherwise once per batch.
+            if visualizer:
+                for i, detection in enumerate(detections):
+                    ts = float(timestamps[i])
+                    state_machine.update(
+                        timestamp=ts,
+                        active_zones=int(active_zones[i]),
+                        smooth_energy=float(smooth_energies[i]),
+                        num_skeletons=int(num_skeletons[i]),
+                        logic_step=logic_step
+                    )
                     display = visualizer.draw_full_overlay(
-                        sf,
+                        small_frames[i],
                         zone_mgr.scaled_zones,
-                        zone_status.occupancy,
+                        occupancy[i].tolist(),
                         detection.raw_keypoints,
-                        smooth_energy,
+                        float(smooth_energies[i]),
                         state_machine.get_threshold(),
                         state_machine.get_state_name(),
                         ts
@@ -295,20 +394,22 @@ def process_video(config: Config) -> dict:
                             print("\n⚠️ Processing interrupted by user")
                         break
 
-                # Progress indicator — print every 100 frames so the UI stays responsive
-                if fi % 100 == 0:
-                    elapsed = time.time() - start_time
-                    fps_proc = fi / elapsed if elapsed > 0 else 0
-                    percent = (fi / total_frames) * 100
-                    print(f"   [{percent:5.1f}%] Frame {fi}/{total_frames} ({fps_proc:.1f} FPS)", flush=True)
-
-            batch.clear()
-
-            if user_quit:
-                break
+                if user_quit:
+                    break
+            else:
+                state_machine.update_batch(
+                    timestamps, active_zones, smooth_energies, num_skeletons, logic_step
+                )
 
-        if not ret:
-            break
+            # Progress indicator — checked once per batch, printed every 100+ frames
+            # (a frame-count gap rather than fi % 100, which large steps can skip)
+            fi = int(frame_ids[-1])
+            if fi - last_progress_frame >= 100:
+                last_progress_frame = fi
+                elapsed = time.monotonic() - start_time
+                fps_proc = fi / elapsed if elapsed > 0 else 0
+                percent = (fi / total_frames) * 100
+                print(f"   [{percent:5.1f}%] Frame {fi}/{total_frames} ({fps_proc:.1f} FPS)", flush=True)
     
     cap.release()
     if config.show_visuals:
@@ -316,7 +417,7 @@ def process_video(config: Config) -> dict:
     
     # Get results
     clips = state_machine.get_clips()
-    elapsed_total = time.time() - start_time
+    elapsed_total = time.monotonic() - start_time
     
     if config.debug_mode:
         print(f"\n{'='*60}")
@@ -344,50 +445,87 @@ def process_video(config: Config) -> dict:
     return result
 
 
+def output_path_for(video: str, output: str, multiple: bool) -> str:
+    """Output JSON path: `output` for a single video, else <video stem>_<output name> beside the video."""
+    if not multiple:
+        return output
+    video_path = Path(video)
+    return str(video_path.with_name(f"{video_path.stem}_{Path(output).name}"))
+
+
+def save_result(config: Config, result: dict, quiet: bool) -> None:
+    """Write one video's result JSON and print its clip summary."""
+    save_json(result, config.output_json)
+    
+    num_clips = len(result['clips'])
+    
+    if config.debug_mode:
+        print(f"💾 Saved {num_clips} clips to {config.output_json}")
+        
+        if num_clips > 0:
+            print("\nClip Summary:")
+            print("-" * 70)
+            print(f"{'#':<4} {'Start':<10} {'End':<10} {'Duration':<10} {'Tag':<10} {'Energy':<10}")
+            print("-" * 70)
+            for i, clip in enumerate(result['clips'], 1):
+                print(f"{i:<4} {clip['start']:<10.1f} {clip['end']:<10.1f} "
+                      f"{clip['duration']:<10.1f} {clip['tag']:<10} {clip['peak_energy']:<10}")
+    
+    if not quiet:
+        if num_clips == 0:
+            print(f"⚠️ No clips detected in {result['video']}. Try adjusting sensitivity settings.")
+        else:
+            print(f"\n✅ Success! Found {num_clips} clips → {config.output_json}")
+
+
 def main():
     """Main entry point."""
     args = parse_args()
     
-    # Validate input file exists
-    if not Path(args.video).exists():
-        print(f"❌ Error: Video file not found: {args.video}", file=sys.stderr)
-        sys.exit(1)
+    # Validate input files exist
+    for video in args.videos:
+        if not Path(video).exists():
+            print(f"❌ Error: Video file not found: {video}", file=sys.stderr)
+            sys.exit(1)
     
     if not Path(args.zones).exists():
         print(f"❌ Error: Zones file not found: {args.zones}", file=sys.stderr)
-        print(f"   Run zone setup first: python -m tools.zone_wizard_poly {args.video}")
+        print(f"   Run zone setup first: python -m tools.zone_wizard_poly {args.videos[0]}")
         sys.exit(1)
     
-    # Create config and run
-    config = create_config(args)
+    # Create one config per video and run
+    multiple = len(args.videos) > 1
+    configs = [
+        create_config(args, video, output_path_for(video, args.output, multiple))
+        for video in args.videos
+    ]
+    
+    # The preview window needs the main process, so previews run one video at a time
+    max_workers = 1 if args.preview else args.jobs
+    
+    failed = []
+    
+    def on_done(config: Config, result, error):
+        # Save each video as soon as it finishes; one failure doesn't lose the rest
+        if error is None:
+            try:
+                save_result(config, result, args.quiet)
+                return
+            except Exception as e:
+                error = e
+        failed.append(config.video_path)
+        print(f"\n❌ Error processing {config.video_path}: {error}", file=sys.stderr)
+        if args.debug:
+            import traceback
+            traceback.print_exception(error)
     
     try:
-        result = process_video(config)
-        
-        # Save JSON output
-        with open(config.output_json, 'w') as f:
-            json.dump(result, f, indent=2)
-        
-        num_clips = len(result['clips'])
-        
-        if config.debug_mode:
-            print(f"💾 Saved {num_clips} clips to {config.output_json}")
-            
-            if num_clips > 0:
-                print("\nClip Summary:")
-                print("-" * 70)
-                print(f"{'#':<4} {'Start':<10} {'End':<10} {'Duration':<10} {'Tag':<10} {'Energy':<10}")
-                print("-" * 70)
-                for i, clip in enumerate(result['clips'], 1):
-                    print(f"{i:<4} {clip['start']:<10.1f} {clip['end']:<10.1f} "
-                          f"{clip['duration']:<10.1f} {clip['tag']:<10} {clip['peak_energy']:<10}")
-        
-        if not args.quiet:
-            if num_clips == 0:
-                print("⚠️ No clips detected. Try adjusting sensitivity settings.")
-            else:
-                print(f"\n✅ Success! Found {num_clips} clips → {config.output_json}")
+        process_videos(configs, process_video, max_workers=max_workers, on_done=on_done)
         
+        if failed:
+            if multiple:
+                print(f"\n❌ {len(failed)} of {len(configs)} videos failed: {', '.join(failed)}", file=sys.stderr)
+            sys.exit(1)
         sys.exit(0)
         
     except KeyboardInterrupt:
@@ -402,4 +540,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Spawned pool workers re-run the frozen (PyInstaller) binary; let them
+    # run their task instead of main()
+    multiprocessing.freeze_support()
     main()
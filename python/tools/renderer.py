@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 """
-Headless Renderer - Video Clip Compiler (FFmpeg filter_complex + encode)
+Headless Renderer - Video Clip Compiler (FFmpeg per-clip encode + concat demuxer)
 
-Frame-accurate trim and concat with re-encode so cuts are exact and there are
-no freezes at boundaries. Uses hardware encoding when available (Video Toolbox
-on macOS) for speed; falls back to libx264 with preset fast. MP4 input recommended.
+Frame-accurate cuts with re-encode so there are no freezes at boundaries. Each
+clip is encoded to its own segment in a separate ffmpeg process (several at once),
+then the segments are joined with the concat demuxer as a stream copy. Uses
+hardware encoding when available (Video Toolbox on macOS) for speed; falls back
+to libx264 with preset fast. MP4 input recommended.
 
 Supports optional score overlay, stat screen, and resolution via --config JSON.
 
@@ -17,19 +19,35 @@ Usage:
     python tools/renderer.py --video ... --clips ... --output ... --config path/to/export-config.json
 """
 
+import functools
+import hashlib
 import json
+import math
+import os
 import platform
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fractions import Fraction
 from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; falls back to the stdlib json module
+    _json_loads = json.loads
 
 
 # Optional: set by --ffmpeg-dir to use bundled binaries
 _ffmpeg_dir: str | None = None
 
 
+@functools.lru_cache(maxsize=1)
 def find_ffmpeg() -> str:
     """Return path to ffmpeg binary. Check bundled dir first, then Homebrew, then PATH."""
     # Bundled ffmpeg (passed via --ffmpeg-dir from Electron in production)
@@ -55,6 +73,7 @@ def find_ffmpeg() -> str:
     return ffmpeg
 
 
+@functools.lru_cache(maxsize=1)
 def find_ffprobe() -> str:
     """Return path to ffprobe (same dir as ffmpeg)."""
     # Bundled ffprobe
@@ -72,6 +91,34 @@ def find_ffprobe() -> str:
 
 MAX_OUTPUT_FPS = 120
 
+# Encoder threads per segment ffmpeg; several segments run at once, so keep each small
+SEGMENT_THREADS = 2
+
+# ffmpeg stderr lines kept for error reports (the tail holds the actual error)
+STDERR_TAIL_LINES = 256
+
+# Concurrent stream-copy extractions on the fast path (I/O bound, not CPU)
+FAST_COPY_WORKERS = 8
+
+# Keyframe preflight margin (seconds) around frame-snapped clip boundaries;
+# far below one frame period, so it only absorbs float rounding
+KEYFRAME_EPSILON = 1e-4
+
+# Concurrent segment encodes on a hardware encoder; throughput plateaus after ~2
+HW_MAX_PARALLEL = 2
+
+# Overall encode progress is printed each time it advances by this many percent
+PROGRESS_STEP_PERCENT = 5
+
+
+def default_max_parallel() -> int:
+    """Concurrent segment encodes when --max-parallel is not given.
+    The first encoder tried decides: Video Toolbox (macOS) is a shared hardware
+    block, libx264 is CPU-bound and each job already uses SEGMENT_THREADS."""
+    if platform.system() == "Darwin":
+        return HW_MAX_PARALLEL
+    return max(1, (os.cpu_count() or 1) // SEGMENT_THREADS)
+
 RESOLUTIONS: dict[str, tuple[int, int]] = {
     "720p":  (1280, 720),
     "1080p": (1920, 1080),
@@ -80,63 +127,81 @@ RESOLUTIONS: dict[str, tuple[int, int]] = {
 }
 
 
-def get_video_fps(video_path: Path, ffprobe: str) -> float:
-    """Return the frame rate of the first video stream, capped at MAX_OUTPUT_FPS."""
+class VideoInfo(NamedTuple):
+    """Stream metadata from a single ffprobe run (see probe_video)."""
+    fps: float
+    width: int
+    height: int
+    has_audio: bool
+    sample_rate: int
+    channel_layout: str
+    audio_codec: str | None
+    frame_rate: Fraction  # exact, uncapped r_frame_rate (e.g. 30000/1001)
+
+
+@functools.lru_cache(maxsize=8)
+def probe_video(video_path: str, ffprobe: str) -> VideoInfo:
+    """Probe a file once and return its fps (capped at MAX_OUTPUT_FPS), size and audio presence.
+    Falls back to 30 fps / 1920x1080 / no audio (44.1 kHz stereo) for anything
+    ffprobe can't report.
+    Cached, so repeated lookups for the same file don't fork ffprobe again."""
+    fps, width, height, has_audio = 30.0, 1920, 1080, False
+    sample_rate, channel_layout, audio_codec = 44100, "stereo", None
+    frame_rate = Fraction(30)
     result = subprocess.run(
-        [ffprobe, "-v", "quiet", "-select_streams", "v:0",
-         "-print_format", "json", "-show_streams", str(video_path)],
+        [ffprobe, "-v", "quiet", "-print_format", "json", "-show_streams", video_path],
         capture_output=True, text=True,
     )
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        for s in data.get("streams", []):
-            # r_frame_rate is like "30/1" or "30000/1001"
-            rfr = s.get("r_frame_rate", "")
-            if "/" in rfr:
-                num, den = rfr.split("/", 1)
-                try:
-                    source_fps = float(num) / float(den)
-                    if source_fps > 0:
-                        return round(min(source_fps, MAX_OUTPUT_FPS), 3)
-                except (ValueError, ZeroDivisionError):
-                    pass
-    return 30.0
+    if result.returncode != 0:
+        return VideoInfo(fps, width, height, has_audio, sample_rate, channel_layout, audio_codec, frame_rate)
+    streams = _json_loads(result.stdout).get("streams", [])
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    has_audio = audio is not None
+    if audio:
+        sample_rate = int(audio.get("sample_rate") or sample_rate)
+        channel_layout = audio.get("channel_layout") or channel_layout
+        audio_codec = audio.get("codec_name")
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    # r_frame_rate is like "30/1" or "30000/1001"
+    rfr = video.get("r_frame_rate", "")
+    if "/" in rfr:
+        num, den = rfr.split("/", 1)
+        try:
+            rate = Fraction(int(num), int(den))
+            if rate > 0:
+                frame_rate = rate
+                fps = round(min(float(rate), MAX_OUTPUT_FPS), 3)
+        except (ValueError, ZeroDivisionError):
+            pass
+    if video.get("width") and video.get("height"):
+        width, height = int(video["width"]), int(video["height"])
+    return VideoInfo(fps, width, height, has_audio, sample_rate, channel_layout, audio_codec, frame_rate)
+
+
+def get_video_fps(video_path: Path, ffprobe: str) -> float:
+    """Return the frame rate of the first video stream, capped at MAX_OUTPUT_FPS."""
+    return probe_video(str(video_path), ffprobe).fps
 
 
 def get_video_resolution(video_path: Path, ffprobe: str) -> tuple[int, int]:
     """Return (width, height) of the first video stream."""
-    result = subprocess.run(
-        [ffprobe, "-v", "quiet", "-select_streams", "v:0",
-         "-print_format", "json", "-show_streams", str(video_path)],
-        capture_output=True, text=True,
-    )
-    if result.returncode == 0:
-        data = json.loads(result.stdout)
-        for s in data.get("streams", []):
-            w = s.get("width")
-            h = s.get("height")
-            if w and h:
-                return (int(w), int(h))
-    return (1920, 1080)
+    info = probe_video(str(video_path), ffprobe)
+    return (info.width, info.height)
 
 
 def has_audio_stream(video_path: Path, ffprobe: str) -> bool:
     """Return True if the file has at least one audio stream."""
-    result = subprocess.run(
-        [ffprobe, "-v", "quiet", "-print_format", "json", "-show_streams", str(video_path)],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        return False
-    data = json.loads(result.stdout)
-    return any(s.get("codec_type") == "audio" for s in data.get("streams", []))
+    return probe_video(str(video_path), ffprobe).has_audio
+
+
+def load_json(path: Path) -> Any:
+    """Read a JSON file (parsed with orjson when installed)."""
+    return _json_loads(path.read_bytes())
 
 
 def load_clips(data_path: Path) -> list:
     """Load and filter clips from JSON (exclude trash, keep only kept clips)."""
-    with open(data_path, "r") as f:
-        data = json.load(f)
+    data = load_json(data_path)
     clips = data.get("clips", [])
     filtered = [
         c for c in clips
@@ -146,21 +211,51 @@ def load_clips(data_path: Path) -> list:
     return filtered
 
 
-def run_ffmpeg(cmd: list[str]) -> tuple[bool, str]:
-    """Run an ffmpeg command. Return (success, stderr_text)."""
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    err = (result.stderr or result.stdout or "").strip()
-    return (result.returncode == 0, err)
+def run_ffmpeg(
+    cmd: list[str],
+    on_progress: Callable[[dict[str, str]], None] | None = None,
+) -> tuple[bool, str]:
+    """Run an ffmpeg command, streaming stderr. Return (success, stderr_text).
+    Only the last STDERR_TAIL_LINES lines are kept, so long encodes don't buffer
+    all of stderr. If the command uses `-progress pipe:2`, its key=value lines
+    are collected instead and passed to on_progress once per update block.
+    """
+    tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+    parse_progress = "-progress" in cmd
+    progress: dict[str, str] = {}
+    with subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, errors="replace", bufsize=1,
+    ) as proc:
+        for line in proc.stderr:
+            line = line.rstrip()
+            key, sep, value = line.partition("=")
+            if parse_progress and sep and key.isidentifier():
+                progress[key] = value
+                # Every update block ends with progress=continue|end
+                if key == "progress":
+                    if on_progress:
+                        on_progress(progress)
+                    progress = {}
+                continue
+            if line:
+                tail.append(line)
+    return (proc.returncode == 0, "\n".join(tail))
+
+
+# Drawtext escapes (and stripped control characters), applied in one pass by escape_drawtext
+_DRAWTEXT_ESCAPES = str.maketrans({
+    "\\": "\\\\", "'": "\\'", ":": "\\:", "%": "\\%", '"': '\\"',
+    "\n": " ", "\r": "", "\x00": "",
+})
 
 
 def escape_drawtext(s: str) -> str:
     """Escape special characters for FFmpeg drawtext filter."""
-    s = str(s).replace("\n", " ").replace("\r", "").replace("\x00", "")
-    for old, new in [("\\", "\\\\"), ("'", "\\'"), (":", "\\:"), ("%", "\\%"), ('"', '\\"')]:
-        s = s.replace(old, new)
-    return s
+    return str(s).translate(_DRAWTEXT_ESCAPES)
 
 
+@functools.lru_cache(maxsize=1)
 def get_default_font_path() -> str | None:
     """Return a system font path for drawtext, or None to use FFmpeg default."""
     candidates = [
@@ -175,6 +270,7 @@ def get_default_font_path() -> str | None:
     return None
 
 
+@functools.lru_cache(maxsize=1)
 def get_default_bold_font_path() -> str | None:
     """Return a bold system font path for drawtext (score text)."""
     candidates = [
@@ -257,17 +353,13 @@ def _build_drawtext_filters(
     return ",".join(parts)
 
 
-def _run_encode(
-    ffmpeg: str,
-    inputs: list[str],
-    filter_complex: str,
-    output_path: Path,
-    has_audio: bool,
-    fps: float = 30.0,
-    resolution: tuple[int, int] = (1920, 1080),
-) -> tuple[bool, str]:
-    """Run ffmpeg encode with given inputs and filter_complex."""
-    on_mac = platform.system() == "Darwin"
+def _pick_video_codec_args(
+    on_mac: bool,
+    fps: float,
+    resolution: tuple[int, int],
+) -> list[tuple[str, list[str]]]:
+    """Return (name, codec args) for each video encoder to try, in order:
+    Video Toolbox on macOS, then libx264."""
     out_w, out_h = resolution
     # Scale VideoToolbox bitrate by resolution and fps relative to 1080p30 baseline
     pixel_ratio = (out_w * out_h) / (1920 * 1080)
@@ -277,17 +369,22 @@ def _run_encode(
     if on_mac:
         encoders_to_try.append(("h264_videotoolbox", ["-c:v", "h264_videotoolbox", "-b:v", vt_bitrate]))
     encoders_to_try.append(("libx264", ["-c:v", "libx264", "-preset", "fast", "-crf", "23"]))
+    return encoders_to_try
+
 
-    fps_str = str(fps)
+def _run_with_encoders(
+    build_cmd: Callable[[list[str]], list[str]],
+    fps: float,
+    resolution: tuple[int, int],
+    on_progress: Callable[[dict[str, str]], None] | None = None,
+) -> tuple[bool, str]:
+    """Run build_cmd(video_codec_args) with each encoder from _pick_video_codec_args
+    until one succeeds, moving on only when an encoder is unavailable.
+    on_progress is passed through to run_ffmpeg."""
+    on_mac = platform.system() == "Darwin"
     last_err = ""
-    for name, video_codec_args in encoders_to_try:
-        cmd = [ffmpeg, "-y"]
-        for inp in inputs:
-            cmd.extend(["-i", inp])
-        cmd.extend(["-filter_complex", filter_complex, "-map", "[outv]", "-map", "[outa]"])
-        cmd.extend(video_codec_args)
-        cmd.extend(["-r", fps_str, "-c:a", "aac", "-b:a", "192k", "-map_metadata", "-1", "-movflags", "+faststart", str(output_path)])
-        ok, err = run_ffmpeg(cmd)
+    for name, video_codec_args in _pick_video_codec_args(on_mac, fps, resolution):
+        ok, err = run_ffmpeg(build_cmd(video_codec_args), on_progress)
         if ok:
             return True, err
         last_err = err
@@ -298,54 +395,199 @@ def _run_encode(
     return False, f"No suitable encoder found. Last error:\n{last_err}"
 
 
+def _encode_segment(
+    ffmpeg: str,
+    video_path: Path,
+    start: float,
+    duration: float,
+    extra_inputs: list[str],
+    filter_complex: str,
+    output_path: Path,
+    fps: float = 30.0,
+    resolution: tuple[int, int] = (1920, 1080),
+    force_fps: bool = False,
+    copy_audio: bool = False,
+    on_progress: Callable[[dict[str, str]], None] | None = None,
+) -> tuple[bool, str]:
+    """Encode one clip to its own segment file.
+    The source is input 0, seeked to `start` and limited to `duration` (input-side
+    seek is still frame-accurate when re-encoding); extra_inputs are overlay images.
+    filter_complex must produce [outv], and [outa] unless copy_audio is set, in which
+    case the source's first audio stream is stream-copied. Every segment uses the same codec
+    params (pix_fmt, fps) so the segments can be joined with a stream copy.
+    The graph's fps filter already sets the frame rate; force_fps adds an output
+    -r as well, only needed when the user picked an fps other than the source's.
+    on_progress receives ffmpeg's -progress blocks (out_time_us etc.) while encoding.
+    """
+    rate_args = ["-r", str(fps)] if force_fps else []
+    if copy_audio:
+        audio_args = ["-map", "0:a:0", "-c:a", "copy"]
+    else:
+        audio_args = ["-map", "[outa]", "-c:a", "aac", "-b:a", "192k"]
+
+    def build_cmd(video_codec_args: list[str]) -> list[str]:
+        cmd = [ffmpeg, "-y", "-nostats", "-progress", "pipe:2"]
+        cmd.extend(["-ss", str(start), "-t", str(duration), "-i", str(video_path)])
+        for inp in extra_inputs:
+            cmd.extend(["-i", inp])
+        cmd.extend(["-filter_complex", filter_complex, "-map", "[outv]"])
+        cmd.extend(video_codec_args)
+        cmd.extend(["-pix_fmt", "yuv420p", *rate_args, "-threads", str(SEGMENT_THREADS)])
+        cmd.extend([*audio_args, "-map_metadata", "-1", str(output_path)])
+        return cmd
+
+    return _run_with_encoders(build_cmd, fps, resolution, on_progress)
+
+
+def _concat_segments(ffmpeg: str, segment_paths: list[Path], output_path: Path) -> tuple[bool, str]:
+    """Join segments with the concat demuxer (stream copy). The list file is
+    written next to the first segment."""
+    concat_file = segment_paths[0].parent / "concat.txt"
+    with open(concat_file, "w") as f:
+        for seg in segment_paths:
+            f.write(f"file '{seg}'\n")
+
+    # Regenerate timestamps so the joined stream starts at 0 and stays monotonic
+    cmd = [
+        ffmpeg, "-y",
+        "-fflags", "+genpts",
+        "-f", "concat", "-safe", "0",
+        "-i", str(concat_file),
+        "-c", "copy", "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    return run_ffmpeg(cmd)
+
+
+def _frame_index(t: float, frame_rate: Fraction) -> int:
+    """Index of the source frame showing at time t (clip times are rounded to ms,
+    so a time up to half a millisecond before a frame counts as that frame)."""
+    return max(0, math.floor((Fraction(t) + Fraction(1, 2000)) * frame_rate))
+
+
+def _snap_clips(clips: list, frame_rate: Fraction) -> list:
+    """Return copies of clips with start/end moved to the source frame times they fall on,
+    plus the frame span as "frames" (at least one frame per clip)."""
+    snapped = []
+    for c in clips:
+        first = _frame_index(float(c["start"]), frame_rate)
+        last = max(first + 1, _frame_index(float(c["end"]), frame_rate))
+        snapped.append({
+            **c,
+            "start": float(first / frame_rate),
+            "end": float(last / frame_rate),
+            "frames": last - first,
+        })
+    return snapped
+
+
+def _keyed_source(ffmpeg: str, video_path: Path, clips: list, frame_rate: Fraction) -> Path:
+    """Opt-in fast-path preflight: re-encode the source once with a keyframe at every
+    clip boundary, so stream-copy cuts land exactly on the clip times.
+    clips must already be frame-snapped (see _snap_clips) and cut with the same
+    frame_rate passed to _run_fast_copy.
+    The result is cached next to the source as {stem}.keyed-{hash}.mp4, keyed on the
+    source mtime and the boundary frames, so repeat exports of the same clips (e.g.
+    while iterating on a scoreboard) are pure stream copy.
+    """
+    frames = sorted({_frame_index(float(c[k]), frame_rate) for c in clips for k in ("start", "end")})
+    key_src = f"{video_path.stat().st_mtime_ns}:{frame_rate}:" + ",".join(str(f) for f in frames)
+    key = hashlib.sha1(key_src.encode()).hexdigest()[:12]
+    keyed = video_path.with_name(f"{video_path.stem}.keyed-{key}.mp4")
+    if keyed.exists():
+        print(f"Using keyframe-aligned source: {keyed}")
+        return keyed
+
+    print("Preflight: re-encoding source with keyframes at clip boundaries (cached for next export)")
+    # -force_key_frames keys the first frame at or after each time; aim just before
+    # the boundary frame so float rounding can't push the key onto the next frame
+    force_at = ",".join(f"{max(0.0, float(f / frame_rate) - KEYFRAME_EPSILON):.6f}" for f in frames)
+    partial = keyed.with_name(keyed.stem + ".part.mp4")
+    cmd = [
+        ffmpeg, "-y", "-i", str(video_path),
+        "-map", "0:v:0", "-map", "0:a?",
+        "-c:v", "libx264", "-preset", "fast", "-crf", "18",
+        "-force_key_frames", force_at,
+        # No extra keyframes from scene cuts; only the forced ones matter
+        "-x264-params", "scenecut=0",
+        "-c:a", "copy", "-map_metadata", "-1", "-movflags", "+faststart",
+        str(partial),
+    ]
+    ok, err = run_ffmpeg(cmd)
+    if not ok:
+        partial.unlink(missing_ok=True)
+        raise RuntimeError(f"Keyframe preflight failed.\n{err}")
+    partial.replace(keyed)
+    return keyed
+
+
 def _run_fast_copy(
     ffmpeg: str,
     video_path: Path,
     clips: list,
     output_path: Path,
+    keyed: bool = False,
 ) -> None:
     """Fast-path: stream-copy video, re-encode audio for precise A/V sync.
-    Cuts land on the nearest keyframe, so clips may start a fraction of a second early.
+    Cuts land on the keyframe at or before each clip start, so clips may start a
+    fraction of a second early. With keyed=True, video_path is a _keyed_source
+    output and clips come from _snap_clips: each segment then starts on the clip's
+    start frame and holds exactly its "frames" frames.
     Audio is re-encoded (trivially fast) to avoid desync from misaligned packet boundaries.
     """
     n = len(clips)
     with tempfile.TemporaryDirectory() as tmpdir:
         tmp = Path(tmpdir)
-        segment_paths: list[Path] = []
-        for i, clip in enumerate(clips):
-            start = round(float(clip["start"]), 3)
-            end = round(float(clip["end"]), 3)
-            seg = tmp / f"seg_{i:04d}.mp4"
+        segment_paths = [tmp / f"seg_{i:04d}.mp4" for i in range(n)]
+
+        def extract(i: int) -> tuple[bool, str]:
+            start = float(clips[i]["start"])
+            end = float(clips[i]["end"])
+            if keyed:
+                # Seek just past the forced keyframe so the copy starts on it, then shift
+                # it back to 0. The frame count ends the video on the next boundary
+                # (-t alone stops on dts, a couple of B-frames late); make_zero is left
+                # out because it would delay the video by the AAC encoder's priming.
+                seek, duration = f"{start + KEYFRAME_EPSILON:.6f}", f"{end - start:.6f}"
+                timing = [
+                    "-frames:v", str(clips[i]["frames"]),
+                    "-output_ts_offset", f"{KEYFRAME_EPSILON:.6f}",
+                ]
+            else:
+                start, end = round(start, 3), round(end, 3)
+                seek, duration = str(start), str(round(end - start, 3))
+                timing = ["-avoid_negative_ts", "make_zero"]
+            # Input-side seek jumps straight to the keyframe; give a duration
+            # rather than -to so the cut length doesn't depend on -to semantics
             cmd = [
                 ffmpeg, "-y",
-                "-ss", str(start), "-to", str(end),
+                "-ss", seek, "-t", duration,
                 "-i", str(video_path),
                 "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
-                "-avoid_negative_ts", "make_zero",
+                *timing,
                 "-map_metadata", "-1",
                 "-movflags", "+faststart",
-                str(seg),
+                str(segment_paths[i]),
             ]
-            ok, err = run_ffmpeg(cmd)
-            if not ok:
-                raise RuntimeError(f"Fast copy segment {i+1}/{n} failed.\n{err}")
-            segment_paths.append(seg)
-            print(f"  Segment {i+1}/{n} extracted")
+            return run_ffmpeg(cmd)
+
+        # Stream copies are I/O + mux bound, so run several at once
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(FAST_COPY_WORKERS, n)) as pool:
+            futures = {pool.submit(extract, i): i for i in range(n)}
+            for future in as_completed(futures):
+                i = futures[future]
+                ok, err = future.result()
+                if not ok:
+                    for f in futures:
+                        f.cancel()
+                    raise RuntimeError(f"Fast copy segment {i+1}/{n} failed.\n{err}")
+                done += 1
+                print(f"  Segment {done}/{n} extracted")
 
         # Concat all segments
-        concat_file = tmp / "concat.txt"
-        with open(concat_file, "w") as f:
-            for seg in segment_paths:
-                f.write(f"file '{seg}'\n")
-
-        cmd = [
-            ffmpeg, "-y",
-            "-f", "concat", "-safe", "0",
-            "-i", str(concat_file),
-            "-c", "copy", "-movflags", "+faststart",
-            str(output_path),
-        ]
-        ok, err = run_ffmpeg(cmd)
+        ok, err = _concat_segments(ffmpeg, segment_paths, output_path)
         if not ok:
             raise RuntimeError(f"Fast copy concat failed.\n{err}")
 
@@ -355,10 +597,17 @@ def render_highlights(
     clips: list,
     output_path: Path,
     config: dict | None = None,
+    max_parallel: int = 0,
+    keyframe_preflight: bool = False,
 ) -> None:
     """
-    Frame-accurate trim + concat with encode. No freezes at cuts; A/V in sync.
-    Optional overlay and stat screen via config.
+    Frame-accurate cuts with encode. No freezes at cuts; A/V in sync.
+    Clips are encoded as separate segments in parallel, then joined (plus the
+    optional stat screen) with the concat demuxer. Optional overlay via config.
+    max_parallel: concurrent segment encodes (0 = default_max_parallel()).
+    keyframe_preflight: on the stream-copy fast path, cut from a cached copy of the
+    source with keyframes at the clip boundaries, each snapped to the source frame it
+    falls on (also enabled by config "keyframePreflight").
     """
     if not video_path.exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
@@ -371,8 +620,9 @@ def render_highlights(
     ffprobe = find_ffprobe()
     video_abs = video_path.resolve()
     output_abs = output_path.resolve()
-    has_audio = has_audio_stream(video_abs, ffprobe)
-    fps = get_video_fps(video_abs, ffprobe)
+    probe = probe_video(str(video_abs), ffprobe)
+    has_audio = probe.has_audio
+    fps = probe.fps
     print(f"Source video frame rate: {fps} fps")
 
     cfg = config or {}
@@ -401,7 +651,7 @@ def render_highlights(
     scale_x = w / 1920
     scale_y = h / 1080
     # Always apply scale+pad when output resolution differs from source
-    source_w, source_h = get_video_resolution(video_abs, ffprobe)
+    source_w, source_h = probe.width, probe.height
     needs_scale = (source_w != w or source_h != h)
     scale = f"scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2," if needs_scale else ""
 
@@ -430,98 +680,106 @@ def render_highlights(
     use_drawtext = has_drawtext
     if use_drawtext:
         print(f"Using ffmpeg: {ffmpeg} (drawtext enabled)")
+        # Resolve fonts once; they are the same for every clip
+        score_font_path = score_font_path or get_default_bold_font_path() or get_default_font_path()
+        name_font_path = name_font_path or get_default_font_path()
+
+    @functools.lru_cache(maxsize=256)
+    def drawtext_for(s1: int, s2: int) -> str:
+        """Drawtext chain for one score state; most clips share one with a neighbour."""
+        return _build_drawtext_filters(
+            text_config, s1, s2, team1_name, team2_name, include_names,
+            scale_x=scale_x, scale_y=scale_y,
+            score_font_path=score_font_path, name_font_path=name_font_path,
+        )
 
     has_logo1 = bool(team1_logo_path and Path(team1_logo_path).exists())
     has_logo2 = bool(team2_logo_path and Path(team2_logo_path).exists())
     logo1_cfg = logo_config.get("logo1", {})
     logo2_cfg = logo_config.get("logo2", {})
 
-    inputs = [str(video_abs)]
+    # Overlay logos - preview uses translate(-50%,-50%) so (x,y) is CENTER. Overlay uses top-left.
+    def logo_box(logo_cfg: dict) -> tuple[int, int, int, int]:
+        """Return (width, height, x, y) of a logo in output pixels."""
+        cx = logo_cfg.get("x", 0) * scale_x
+        cy = logo_cfg.get("y", 0) * scale_y
+        lw = int(round(logo_cfg.get("width", 110) * scale_x))
+        lh = int(round(logo_cfg.get("height", 110) * scale_y))
+        return lw, lh, int(round(cx - lw / 2)), int(round(cy - lh / 2))
+
+    # Input 0 is the (seeked) source video; overlay images follow in this order,
+    # each with the size it is pre-scaled to before the segments are encoded
+    overlay_specs: list[tuple[str, int, int]] = []
     if has_overlay_img:
-        inputs.append(str(Path(overlay_path).resolve()))
-    overlay_idx = 1 if has_overlay_img else -1
-    next_idx = len(inputs)
-    logo1_idx = next_idx if has_logo1 else -1
+        overlay_specs.append((str(Path(overlay_path).resolve()), w, h))
+    overlay_idx = len(overlay_specs) if has_overlay_img else -1
     if has_logo1:
-        inputs.append(str(Path(team1_logo_path).resolve()))
-        next_idx += 1
-    logo2_idx = next_idx if has_logo2 else -1
+        lw1, lh1, lx1, ly1 = logo_box(logo1_cfg)
+        overlay_specs.append((str(Path(team1_logo_path).resolve()), lw1, lh1))
+    logo1_idx = len(overlay_specs) if has_logo1 else -1
     if has_logo2:
-        inputs.append(str(Path(team2_logo_path).resolve()))
-
-    def build_filter(use_dt: bool):
+        lw2, lh2, lx2, ly2 = logo_box(logo2_cfg)
+        overlay_specs.append((str(Path(team2_logo_path).resolve()), lw2, lh2))
+    logo2_idx = len(overlay_specs) if has_logo2 else -1
+
+    def build_base(clip: dict) -> tuple[list[str], str]:
+        """Drawtext-free part of one clip segment's graph: [0:v]/[0:a] already start
+        at the clip and overlay inputs are already scaled. Returns (graph parts,
+        label of the last video node)."""
+        start = round(float(clip["start"]), 3)
+        end = round(float(clip["end"]), 3)
+        dur = round(end - start, 3)
         parts = []
-        for i, clip in enumerate(clips):
-            start = round(float(clip["start"]), 3)
-            end = round(float(clip["end"]), 3)
-            dur = round(end - start, 3)
-            # Trim video segment (fps filter normalises high-fps sources like 120fps)
-            trim = f"[0:v]trim=start={start}:end={end},setpts=PTS-STARTPTS,fps={fps}"
-            if scale:
-                trim += f",{scale.rstrip(',')}"
-            trim += f"[vb{i}]"
-            parts.append(trim)
-
-            if has_overlay_img:
-                parts.append(
-                    f"[{overlay_idx}:v]scale={w}:{h},loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[ov{i}]"
-                )
-                parts.append(f"[vb{i}][ov{i}]overlay=0:0[vo{i}]")
-                last_label = f"[vo{i}]"
-            else:
-                last_label = f"[vb{i}]"
-
-            # Overlay logos - preview uses translate(-50%,-50%) so (x,y) is CENTER. Overlay uses top-left.
-            if has_logo1:
-                cx = logo1_cfg.get("x", 0) * scale_x
-                cy = logo1_cfg.get("y", 0) * scale_y
-                lw = int(round(logo1_cfg.get("width", 110) * scale_x))
-                lh = int(round(logo1_cfg.get("height", 110) * scale_y))
-                lx = int(round(cx - lw / 2))
-                ly = int(round(cy - lh / 2))
-                parts.append(
-                    f"[{logo1_idx}:v]scale={lw}:{lh},loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[lg1{i}]"
-                )
-                parts.append(f"{last_label}[lg1{i}]overlay={lx}:{ly}[vl1{i}]")
-                last_label = f"[vl1{i}]"
-            if has_logo2:
-                cx = logo2_cfg.get("x", 0) * scale_x
-                cy = logo2_cfg.get("y", 0) * scale_y
-                lw = int(round(logo2_cfg.get("width", 110) * scale_x))
-                lh = int(round(logo2_cfg.get("height", 110) * scale_y))
-                lx = int(round(cx - lw / 2))
-                ly = int(round(cy - lh / 2))
-                parts.append(
-                    f"[{logo2_idx}:v]scale={lw}:{lh},loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[lg2{i}]"
-                )
-                parts.append(f"{last_label}[lg2{i}]overlay={lx}:{ly}[vl2{i}]")
-                last_label = f"[vl2{i}]"
-
-            if use_dt:
-                s1, s2 = get_clip_state(match_flow, clip)
-                dt = _build_drawtext_filters(
-                    text_config, s1, s2, team1_name, team2_name, include_names,
-                    scale_x=scale_x, scale_y=scale_y,
-                    score_font_path=score_font_path, name_font_path=name_font_path,
-                )
-                # No comma after last_label - [vo0],drawtext creates empty filter '' before drawtext
-                parts.append(f"{last_label}{dt}[v{i}]")
-            else:
-                # No comma: [label]filter[out] is valid; comma would create empty filter
-                parts.append(f"{last_label}format=pix_fmts=yuv420p[v{i}]")
-
-            if has_audio:
-                parts.append(f"[0:a]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{i}]")
-
-        # Concat expects interleaved [v0][a0][v1][a1]... for n segments
-        if has_audio:
-            concat_in = "".join(f"[v{i}][a{i}]" for i in range(n))
-            parts.append(f"{concat_in}concat=n={n}:v=1:a=1[outv][outa]")
+        # fps filter normalises high-fps sources like 120fps
+        base = f"[0:v]setpts=PTS-STARTPTS,fps={fps}"
+        if scale:
+            base += f",{scale.rstrip(',')}"
+        base += "[vb]"
+        parts.append(base)
+
+        if has_overlay_img:
+            parts.append(
+                f"[{overlay_idx}:v]loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[ov]"
+            )
+            parts.append("[vb][ov]overlay=0:0[vo]")
+            last_label = "[vo]"
+        else:
+            last_label = "[vb]"
+
+        if has_logo1:
+            parts.append(
+                f"[{logo1_idx}:v]loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[lg1]"
+            )
+            parts.append(f"{last_label}[lg1]overlay={lx1}:{ly1}[vl1]")
+            last_label = "[vl1]"
+        if has_logo2:
+            parts.append(
+                f"[{logo2_idx}:v]loop=-1:1,trim=duration={dur},setpts=PTS-STARTPTS,fps={fps}[lg2]"
+            )
+            parts.append(f"{last_label}[lg2]overlay={lx2}:{ly2}[vl2]")
+            last_label = "[vl2]"
+
+        if copy_audio:
+            pass  # audio is stream-copied, not part of the graph
+        elif has_audio:
+            parts.append("[0:a]asetpts=PTS-STARTPTS[outa]")
+        else:
+            # Silent track so every segment (and the stat screen) has audio for concat
+            parts.append(f"anullsrc=r={probe.sample_rate}:cl={probe.channel_layout}:d={dur}[outa]")
+        return parts, last_label
+
+    def build_filter(i: int, use_dt: bool) -> str:
+        """Full graph for clip i: its cached base plus the drawtext (or format) tail.
+        The drawtext-missing retry only swaps the tail."""
+        parts, last_label = base_graphs[i]
+        if use_dt:
+            dt = drawtext_for(*get_clip_state(match_flow, clips[i]))
+            # No comma after last_label - [vo],drawtext creates empty filter '' before drawtext
+            tail = f"{last_label}{dt}[outv]"
         else:
-            concat_v = "".join(f"[v{i}]" for i in range(n))
-            parts.append(f"{concat_v}concat=n={n}:v=1:a=0[outv]")
-            parts.append(f"anullsrc=r=44100:cl=stereo,duration={total_clip_duration}[outa]")
-        return ";".join(parts)
+            # No comma: [label]filter[out] is valid; comma would create empty filter
+            tail = f"{last_label}format=pix_fmts=yuv420p[outv]"
+        return ";".join(parts + [tail])
 
     # Fast-path: stream copy when no overlays/text/stat/logos and no resolution change
     # Stream copy can't change fps, so force re-encode if user picked a specific fps
@@ -536,7 +794,15 @@ def render_highlights(
         for i, clip in enumerate(clips):
             tag = clip.get("tag", "Unknown")
             print(f"Clip {i + 1}/{n}: {round(float(clip['start']), 1):.1f}s -> {round(float(clip['end']), 1):.1f}s [{tag}]")
-        _run_fast_copy(ffmpeg, video_abs, clips, output_abs)
+        source, cut_clips, keyed = video_abs, clips, False
+        if keyframe_preflight or cfg.get("keyframePreflight", False):
+            snapped = _snap_clips(clips, probe.frame_rate)
+            try:
+                source = _keyed_source(ffmpeg, video_abs, snapped, probe.frame_rate)
+                cut_clips, keyed = snapped, True
+            except (OSError, RuntimeError) as e:
+                print(f"Note: {e}\nCutting the original source instead (cuts snap to its keyframes).")
+        _run_fast_copy(ffmpeg, source, cut_clips, output_abs, keyed=keyed)
         print(f"\n✓ Successfully rendered (fast copy): {output_abs}")
         print(f"  Total duration: ~{total_clip_duration:.1f}s")
         return
@@ -545,77 +811,87 @@ def render_highlights(
         tag = clip.get("tag", "Unknown")
         print(f"Clip {i + 1}/{n}: {round(float(clip['start']), 1):.1f}s -> {round(float(clip['end']), 1):.1f}s [{tag}]")
 
-    filter_complex = build_filter(use_drawtext)
+    # Segments only cut the audio, so an AAC source can be stream-copied (cuts land on
+    # AAC frame boundaries, ~20 ms) instead of decoded and re-encoded per segment. With
+    # a stat screen the joined segments would mix source and ffmpeg-encoded AAC, so
+    # re-encode then to keep one set of audio params for the concat copy.
+    copy_audio = has_audio and probe.audio_codec == "aac" and not has_stat
+    base_graphs = [build_base(clip) for clip in clips]
 
-    def try_encode(out_path: Path) -> tuple[bool, str]:
-        return _run_encode(ffmpeg, inputs, filter_complex, out_path, has_audio, fps, (w, h))
+    # ffmpeg does the heavy lifting in its own process, so threads are enough here;
+    # the pool size is the bound on concurrent ffmpeg encodes
+    max_workers = max(1, min(n, max_parallel or default_max_parallel()))
+    print(f"Encoding {n} segments ({max_workers} at a time)")
 
-    if has_stat:
-        # Two-pass: render clips first, then concat with stat screen
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
-            temp_mp4 = Path(tmp.name)
-        try:
-            ok, err = try_encode(temp_mp4)
-            if not ok:
-                print("--- FFmpeg encode error (full stderr) ---")
-                print(err)
-                print("--- end stderr ---")
-                print("--- filter_complex (first 1200 chars) ---")
-                print(filter_complex[:1200] + ("..." if len(filter_complex) > 1200 else ""))
-                print("--- end filter_complex ---")
-                print("Manual drawtext test: ffmpeg -f lavfi -i color=c=black:s=1280x720:d=2 -vf \"drawtext=text='Test':fontsize=48:x=100:y=100:fontcolor=white\" -t 2 -y /tmp/drawtext_test.mp4")
-            if not ok and use_drawtext and "No such filter" in err:
-                print("Note: FFmpeg lacks drawtext (needs libfreetype). Exporting without score text.")
-                filter_complex = build_filter(False)
-                ok, err = _run_encode(ffmpeg, inputs, filter_complex, temp_mp4, has_audio, fps, (w, h))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        segment_paths = [tmp / f"seg_{i:04d}.mp4" for i in range(n)]
+
+        # Decode + scale each overlay image once here instead of in every segment
+        overlay_inputs: list[str] = []
+        for j, (src, sw, sh) in enumerate(overlay_specs):
+            scaled = tmp / f"overlay_{j}.png"
+            ok, err = run_ffmpeg([
+                ffmpeg, "-y", "-i", src, "-vf", f"scale={sw}:{sh}",
+                "-frames:v", "1", "-update", "1", str(scaled),
+            ])
             if not ok:
-                raise RuntimeError(f"Encode failed.\nffmpeg stderr:\n{err}\n\nFilter (first 500 chars): {filter_complex[:500]}{'...' if len(filter_complex) > 500 else ''}")
-
-            # Create stat screen video from image
-            stat_abs = Path(stat_path).resolve()
-            with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp2:
-                stat_mp4 = Path(tmp2.name)
-            try:
-                # Force stat screen to exact duration (loop image + trim, and -t to be sure)
-                stat_dur_str = str(stat_duration)
-                stat_filter = f"loop=-1:1,trim=duration={stat_dur_str},setpts=PTS-STARTPTS"
-                # Always scale stat screen to match output resolution
-                stat_filter = f"scale={w}:{h}," + stat_filter
-                fps_str = str(fps)
-                stat_cmd = [
-                    ffmpeg, "-y", "-loop", "1", "-r", fps_str, "-i", str(stat_abs),
-                    "-f", "lavfi", "-i", f"anullsrc=r=44100:cl=stereo:d={stat_dur_str}",
-                    "-vf", stat_filter, "-map", "0:v", "-map", "1:a",
-                    "-c:v", "libx264", "-pix_fmt", "yuv420p", "-r", fps_str,
-                    "-c:a", "aac", "-b:a", "192k",
-                    "-t", stat_dur_str,
-                    "-movflags", "+faststart", str(stat_mp4)
-                ]
-                ok, err = run_ffmpeg(stat_cmd)
-                if not ok:
-                    raise RuntimeError(f"Stat screen encode failed.\n{err}")
-
-                # Concat clips + stat screen
-                concat_list = tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False)
-                concat_list.write(f"file '{temp_mp4.resolve()}'\n")
-                concat_list.write(f"file '{stat_mp4.resolve()}'\n")
-                concat_list.close()
-
-                concat_cmd = [
-                    ffmpeg, "-y", "-f", "concat", "-safe", "0",
-                    "-i", concat_list.name,
-                    "-c", "copy", str(output_abs)
-                ]
-                ok, err = run_ffmpeg(concat_cmd)
-                Path(concat_list.name).unlink(missing_ok=True)
-                if not ok:
-                    raise RuntimeError(f"Concat failed.\n{err}")
-            finally:
-                stat_mp4.unlink(missing_ok=True)
-        finally:
-            temp_mp4.unlink(missing_ok=True)
-    else:
-        ok, err = _run_encode(ffmpeg, inputs, filter_complex, output_abs, has_audio, fps, (w, h))
+                raise RuntimeError(f"Overlay image scale failed: {src}\n{err}")
+            overlay_inputs.append(str(scaled))
+
+        # Overall progress: seconds encoded so far in each segment (from ffmpeg's
+        # -progress out_time_us), reported against the total clip duration
+        encoded_secs = [0.0] * n
+        progress_lock = threading.Lock()
+        last_reported = [0]
+
+        def report_progress(i: int, seconds: float, limit: float) -> None:
+            with progress_lock:
+                encoded_secs[i] = min(max(seconds, 0.0), limit)
+                done_secs = sum(encoded_secs)
+                percent = 100.0 * done_secs / total_clip_duration if total_clip_duration > 0 else 100.0
+                if percent >= last_reported[0] + PROGRESS_STEP_PERCENT:
+                    last_reported[0] = int(percent // PROGRESS_STEP_PERCENT) * PROGRESS_STEP_PERCENT
+                    print(f"  [{percent:5.1f}%] {done_secs:.1f}s / {total_clip_duration:.1f}s encoded")
+
+        def encode_clip(i: int, use_dt: bool) -> tuple[bool, str, str]:
+            clip = clips[i]
+            start = round(float(clip["start"]), 3)
+            dur = round(round(float(clip["end"]), 3) - start, 3)
+            filter_complex = build_filter(i, use_dt)
+
+            def on_progress(block: dict[str, str]) -> None:
+                if block.get("progress") == "end":
+                    report_progress(i, dur, dur)
+                elif block.get("out_time_us", "").isdigit():
+                    report_progress(i, int(block["out_time_us"]) / 1e6, dur)
+
+            ok, err = _encode_segment(
+                ffmpeg, video_abs, start, dur, overlay_inputs, filter_complex,
+                segment_paths[i], fps, (w, h),
+                force_fps=fps_needs_reencode, copy_audio=copy_audio,
+                on_progress=on_progress,
+            )
+            return ok, err, filter_complex
+
+        def encode_all(use_dt: bool) -> tuple[bool, str, str]:
+            """Encode every segment; on the first failure cancel the rest and return its error."""
+            encoded_secs[:] = [0.0] * n
+            last_reported[0] = 0
+            done = 0
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(encode_clip, i, use_dt) for i in range(n)]
+                for future in as_completed(futures):
+                    ok, err, filter_complex = future.result()
+                    if not ok:
+                        for f in futures:
+                            f.cancel()
+                        return False, err, filter_complex
+                    done += 1
+                    print(f"  Segment {done}/{n} encoded")
+            return True, "", ""
+
+        ok, err, filter_complex = encode_all(use_drawtext)
         if not ok:
             print("--- FFmpeg encode error (full stderr) ---")
             print(err)
@@ -626,11 +902,44 @@ def render_highlights(
             print("Manual drawtext test: ffmpeg -f lavfi -i color=c=black:s=1280x720:d=2 -vf \"drawtext=text='Test':fontsize=48:x=100:y=100:fontcolor=white\" -t 2 -y /tmp/drawtext_test.mp4")
         if not ok and use_drawtext and "No such filter" in err:
             print("Note: FFmpeg lacks drawtext (needs libfreetype). Exporting without score text.")
-            filter_complex = build_filter(False)
-            ok, err = _run_encode(ffmpeg, inputs, filter_complex, output_abs, has_audio, fps, (w, h))
+            ok, err, filter_complex = encode_all(False)
         if not ok:
             raise RuntimeError(f"Encode failed.\nffmpeg stderr:\n{err}\n\nFilter (first 500 chars): {filter_complex[:500]}{'...' if len(filter_complex) > 500 else ''}")
 
+        if has_stat:
+            # Create stat screen video from image; it is joined as one more segment
+            stat_abs = Path(stat_path).resolve()
+            stat_mp4 = tmp / "stat.mp4"
+            # Decode + scale the image once, then repeat that frame for the exact
+            # duration (loop filter + trim, and -t to be sure)
+            stat_dur_str = str(stat_duration)
+            stat_filter = f"scale={w}:{h},loop=-1:1,trim=duration={stat_dur_str},setpts=PTS-STARTPTS"
+            fps_str = str(fps)
+            stat_rate_args = ["-r", fps_str] if fps_needs_reencode else []
+
+            # Same encoder as the clip segments, so the concat stream copy sees matching params
+            def stat_cmd(video_codec_args: list[str]) -> list[str]:
+                return [
+                    ffmpeg, "-y", "-framerate", fps_str, "-i", str(stat_abs),
+                    "-f", "lavfi", "-i",
+                    f"anullsrc=r={probe.sample_rate}:cl={probe.channel_layout}:d={stat_dur_str}",
+                    "-vf", stat_filter, "-map", "0:v", "-map", "1:a",
+                    *video_codec_args, "-pix_fmt", "yuv420p", *stat_rate_args,
+                    "-c:a", "aac", "-b:a", "192k",
+                    "-t", stat_dur_str,
+                    "-movflags", "+faststart", str(stat_mp4)
+                ]
+
+            ok, err = _run_with_encoders(stat_cmd, fps, (w, h))
+            if not ok:
+                raise RuntimeError(f"Stat screen encode failed.\n{err}")
+            segment_paths.append(stat_mp4)
+
+        # Concat clips (+ stat screen) as a stream copy
+        ok, err = _concat_segments(ffmpeg, segment_paths, output_abs)
+        if not ok:
+            raise RuntimeError(f"Concat failed.\n{err}")
+
     total_dur = total_clip_duration + (stat_duration if has_stat else 0)
     print(f"\n✓ Successfully rendered: {output_abs}")
     print(f"  Total duration: {total_dur:.1f}s")
@@ -647,19 +956,30 @@ def main() -> None:
     parser.add_argument("--output", required=True, help="Path to output MP4")
     parser.add_argument("--config", help="Path to export config JSON (optional)")
     parser.add_argument("--ffmpeg-dir", help="Directory containing bundled ffmpeg/ffprobe binaries")
+    parser.add_argument(
+        "--max-parallel", type=int, default=0,
+        help="Maximum clip segments encoded at once (default: 2 with hardware encoding, else CPUs/2)"
+    )
+    parser.add_argument(
+        "--keyframe-preflight", action="store_true",
+        help="Fast path only: re-encode the source once with keyframes at clip boundaries "
+             "(cached next to the video) so stream-copy cuts are exact"
+    )
     args = parser.parse_args()
 
     global _ffmpeg_dir
     if args.ffmpeg_dir:
         _ffmpeg_dir = args.ffmpeg_dir
+        # Lookups are cached; drop anything resolved before the dir was known
+        find_ffmpeg.cache_clear()
+        find_ffprobe.cache_clear()
 
     video_path = Path(args.video)
     data_path = Path(args.clips)
     output_path = Path(args.output)
     config = None
     if args.config and Path(args.config).exists():
-        with open(args.config, "r") as f:
-            config = json.load(f)
+        config = load_json(Path(args.config))
 
     if not video_path.exists():
         print(f"ERROR: Video file not found: {video_path}", file=sys.stderr)
@@ -681,7 +1001,10 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        render_highlights(video_path, clips, output_path, config)
+        render_highlights(
+            video_path, clips, output_path, config,
+            max_parallel=args.max_parallel, keyframe_preflight=args.keyframe_preflight,
+        )
     except Exception as e:
         print(f"ERROR: {e}", file=sys.stderr)
         sys.exit(1)
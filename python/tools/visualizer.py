@@ -5,9 +5,46 @@ Provides functions to draw debug overlays on video frames.
 
 import cv2
 import numpy as np
+from functools import lru_cache
 from typing import List, Tuple, Optional
 
 from core.config import Config
+from core.utils import HAS_NUMBA, points_in_polygons
+
+
+@lru_cache(maxsize=512)
+def _text_sprite(
+    text: str,
+    font: int,
+    scale: float,
+    color: Tuple[int, int, int],
+    thickness: int
+) -> Optional[Tuple[np.ndarray, np.ndarray, int, int]]:
+    """
+    Rasterize a string once with cv2.putText for stamping with cv2.copyTo.
+    
+    Args:
+        text: String to render
+        font: OpenCV Hershey font
+        scale: Font scale
+        color: BGR text color
+        thickness: Stroke thickness
+        
+    Returns:
+        (color patch, uint8 mask, dx, dy) with (dx, dy) the patch's top-left
+        offset from the text origin, or None if nothing is drawn
+    """
+    (tw, th), baseline = cv2.getTextSize(text, font, scale, thickness)
+    pad = 2 * thickness + 4
+    canvas = np.zeros((th + baseline + 2 * pad, tw + 2 * pad), dtype=np.uint8)
+    cv2.putText(canvas, text, (pad, pad + th), font, scale, 255, thickness)
+    x, y, w, h = cv2.boundingRect(canvas)
+    if w == 0:
+        return None
+    mask = canvas[y:y + h, x:x + w]
+    patch = np.empty((h, w, 3), dtype=np.uint8)
+    patch[:] = color
+    return patch, mask, x - pad, y - pad - th
 
 
 class Visualizer:
@@ -15,15 +52,35 @@ class Visualizer:
     Draws debug visualizations on video frames.
     
     Includes zone overlays, skeleton rendering, energy bars, and state info.
+    The draw_* helpers draw in place on the frame they are given (the caller
+    owns the copy); draw_full_overlay makes the single copy per frame.
     """
     
-    # Skeleton connections for YOLO pose (COCO format)
-    SKELETON_CONNECTIONS = [
+    # Skeleton connections for YOLO pose (COCO format), as a (16, 2) index array
+    SKELETON_CONNECTIONS = np.array([
         (0, 1), (0, 2), (1, 3), (2, 4),        # Head
         (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),  # Arms
         (5, 11), (6, 12), (11, 12),            # Torso
         (11, 13), (13, 15), (12, 14), (14, 16)  # Legs
-    ]
+    ], dtype=np.intp)
+    
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    
+    # State box colors (BGR); unknown states are drawn white
+    STATE_COLORS = {
+        "SEARCHING": (100, 100, 100),  # Gray
+        "LOCKED": (0, 255, 255),        # Yellow
+        "PROBATION": (0, 165, 255),     # Orange
+        "RALLY": (0, 255, 0)            # Green
+    }
+    
+    # Energy bar size, anchored top-right
+    BAR_WIDTH = 200
+    BAR_HEIGHT = 20
+    BAR_MARGIN = 20
+    
+    # COCO keypoint indices of the ankles (used when occupancy must be computed here)
+    ANKLE_KEYPOINTS = [15, 16]
     
     def __init__(self, config: Config):
         """
@@ -33,6 +90,150 @@ class Visualizer:
             config: Configuration object with color settings
         """
         self.config = config
+        
+        # Per-zone drawing data, rebuilt only when a different zone list comes in
+        self._zone_src: Optional[List[np.ndarray]] = None
+        self._zone_pts: List[np.ndarray] = []
+        self._zone_labels: List[Tuple[str, Tuple[int, int]]] = []
+        # Flattened geometry for the shared point-in-polygon kernel, cached apart
+        # from the drawing data: with preview_scale < 1 occupancy uses the
+        # full-size zones while drawing uses the scaled ones
+        self._occ_src: Optional[List[np.ndarray]] = None
+        self._zones_flat = np.empty((0, 2), dtype=np.float32)
+        self._zone_offsets = np.zeros(1, dtype=np.int64)
+        self._zone_bounds = np.empty((0, 4), dtype=np.float32)
+        # Bounding box of all zones (x0, y0, x1, y1), the only region the fill blend touches
+        self._zone_roi: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        # Scratch region for the zone-fill blend, reused across frames
+        self._overlay_buf: Optional[np.ndarray] = None
+        # Energy bar layout for the last frame width: (width, bar_x, bar_y)
+        self._bar_layout: Tuple[int, int, int] = (-1, 0, 0)
+        # Zones scaled by preview_scale, for the zone list they came from
+        self._scaled_src: Optional[List[np.ndarray]] = None
+        self._scaled_zones: List[np.ndarray] = []
+        
+        if HAS_NUMBA:
+            # Compile (or load) the occupancy kernel now rather than on the first frame
+            points_in_polygons(
+                np.zeros((1, 2), dtype=np.float32),
+                np.array([[0, 0], [1, 0], [0, 1]], dtype=np.float32),
+                np.array([0, 3], dtype=np.int64),
+                np.array([[0, 0, 1, 1]], dtype=np.float32)
+            )
+    
+    def set_zones(self, zones: List[np.ndarray]):
+        """
+        Precompute drawing data for a zone list (done automatically by
+        draw_zones whenever it is given a different list).
+        
+        Args:
+            zones: List of zone polygon arrays
+        """
+        self._zone_src = zones
+        self._zone_pts = [np.ascontiguousarray(zone, dtype=np.int32).reshape(-1, 1, 2) for zone in zones]
+        # Label at the vertex mean (close enough to the centroid for a label)
+        self._zone_labels = []
+        for i, pts in enumerate(self._zone_pts):
+            if len(pts) >= 3:
+                cx, cy = pts.reshape(-1, 2).mean(axis=0).astype(int)
+                self._zone_labels.append((f"Z{i+1}", (int(cx) - 15, int(cy))))
+        
+        if zones:
+            all_pts = np.concatenate([pts.reshape(-1, 2) for pts in self._zone_pts])
+            x0, y0 = all_pts.min(axis=0)
+            x1, y1 = all_pts.max(axis=0) + 1
+            self._zone_roi = (int(x0), int(y0), int(x1), int(y1))
+        else:
+            self._zone_roi = (0, 0, 0, 0)
+    
+    def _set_occupancy_zones(self, zones: List[np.ndarray]):
+        """
+        Precompute point-in-polygon geometry for a zone list (done automatically
+        by compute_occupancy whenever it is given a different list).
+        
+        Args:
+            zones: List of zone polygon arrays
+        """
+        self._occ_src = zones
+        zone_pts = [np.ascontiguousarray(zone, dtype=np.int32).reshape(-1, 2) for zone in zones]
+        if zones:
+            self._zones_flat = np.concatenate(zone_pts).astype(np.float32)
+            self._zone_offsets = np.cumsum([0] + [len(pts) for pts in zone_pts]).astype(np.int64)
+            self._zone_bounds = np.array(
+                [np.r_[pts.min(axis=0), pts.max(axis=0)] for pts in zone_pts],
+                dtype=np.float32
+            )
+        else:
+            self._zones_flat = np.empty((0, 2), dtype=np.float32)
+            self._zone_offsets = np.zeros(1, dtype=np.int64)
+            self._zone_bounds = np.empty((0, 4), dtype=np.float32)
+    
+    def _put_text(
+        self,
+        img: np.ndarray,
+        text: str,
+        org: Tuple[int, int],
+        scale: float,
+        color: Tuple[int, int, int],
+        thickness: int
+    ):
+        """
+        Same pixels as cv2.putText, stamped from a cached sprite. Only worth it
+        for strings that repeat across frames (labels, state names, counts);
+        per-frame values like timestamps should use cv2.putText directly.
+        
+        Text within a pixel of the frame edge is drawn with cv2.putText, since
+        line clipping there doesn't rasterize like the unclipped sprite.
+        
+        Args:
+            img: BGR image to draw on
+            text: String to draw
+            org: Bottom-left corner of the text (as for cv2.putText)
+            scale: Font scale
+            color: BGR text color
+            thickness: Stroke thickness
+        """
+        sprite = _text_sprite(text, self.FONT, scale, tuple(color), thickness)
+        if sprite is None:
+            return
+        patch, mask, dx, dy = sprite
+        x, y = org[0] + dx, org[1] + dy
+        h, w = mask.shape
+        if x < 1 or y < 1 or x + w >= img.shape[1] or y + h >= img.shape[0]:
+            cv2.putText(img, text, org, self.FONT, scale, color, thickness)
+            return
+        cv2.copyTo(patch, mask, img[y:y + h, x:x + w])
+    
+    def compute_occupancy(
+        self,
+        zones: List[np.ndarray],
+        keypoints: Optional[np.ndarray]
+    ) -> List[bool]:
+        """
+        Compute zone occupancy from raw keypoints, for callers that don't
+        already have it from ZoneManager.
+        
+        Uses confident ankle keypoints and the same point-in-polygon kernel as
+        ZoneManager (compiled when numba is installed).
+        
+        Args:
+            zones: List of zone polygon arrays
+            keypoints: Raw keypoint data from YOLO (N x 17 x 3), or None
+            
+        Returns:
+            Per-zone occupancy list
+        """
+        if zones is not self._occ_src:
+            self._set_occupancy_zones(zones)
+        if keypoints is None or len(keypoints) == 0 or not zones:
+            return [False] * len(zones)
+        
+        ankles = np.asarray(keypoints)[:, self.ANKLE_KEYPOINTS].reshape(-1, 3)
+        ankles = ankles[ankles[:, 2] > self.config.keypoint_confidence_threshold, :2]
+        return points_in_polygons(
+            np.ascontiguousarray(ankles, dtype=np.float32),
+            self._zones_flat, self._zone_offsets, self._zone_bounds
+        ).tolist()
     
     def draw_zones(
         self, 
@@ -41,7 +242,7 @@ class Visualizer:
         occupancy: Optional[List[bool]] = None
     ) -> np.ndarray:
         """
-        Draw zone polygons on frame.
+        Draw zone polygons on frame (in place).
         
         Args:
             frame: BGR image to draw on
@@ -49,31 +250,48 @@ class Visualizer:
             occupancy: Optional list of booleans indicating zone occupancy
             
         Returns:
-            Frame with zones drawn
+            The same frame, with zones drawn
         """
-        display = frame.copy()
+        display = frame
+        if not zones:
+            return display
+        if zones is not self._zone_src:
+            self.set_zones(zones)
+        zone_pts = self._zone_pts
         
-        for i, zone in enumerate(zones):
-            is_active = occupancy[i] if occupancy else False
-            color = self.config.color_zone_active if is_active else self.config.color_zone_inactive
-            
-            # Draw filled polygon with transparency
-            overlay = display.copy()
-            cv2.fillPoly(overlay, [zone], color)
-            cv2.addWeighted(overlay, 0.3, display, 0.7, 0, display)
-            
-            # Draw outline
-            cv2.polylines(display, [zone], True, color, 2)
-            
-            # Label zone
-            M = cv2.moments(zone)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                cv2.putText(
-                    display, f"Z{i+1}", (cx - 15, cy),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.config.color_text, 2
-                )
+        colors = [
+            self.config.color_zone_active if occupancy and occupancy[i] else self.config.color_zone_inactive
+            for i in range(len(zones))
+        ]
+        
+        # Filled polygons with transparency: fill every zone, then blend once.
+        # Pixels outside all zones blend to themselves, so only the zones'
+        # bounding box (clipped to the frame) is copied and blended.
+        h, w = display.shape[:2]
+        x0, y0, x1, y1 = self._zone_roi
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, w), min(y1, h)
+        if x1 > x0 and y1 > y0:
+            roi = display[y0:y1, x0:x1]
+            if self._overlay_buf is None or self._overlay_buf.shape != roi.shape:
+                self._overlay_buf = np.empty_like(roi)
+            overlay = self._overlay_buf
+            np.copyto(overlay, roi)
+            for pts, color in zip(zone_pts, colors):
+                cv2.fillPoly(overlay, [pts], color, offset=(-x0, -y0))
+            # cv2.addWeighted's SIMD path is several times faster than a numpy
+            # fixed-point or 256x256 LUT blend over the same region
+            cv2.addWeighted(overlay, 0.3, roi, 0.7, 0, roi)
+        
+        # Outlines, one polylines call per color
+        for color in set(colors):
+            cv2.polylines(display, [p for p, c in zip(zone_pts, colors) if c == color], True, color, 2)
+        
+        # Label zones
+        for label, origin in self._zone_labels:
+            self._put_text(
+                display, label, origin,
+                0.7, self.config.color_text, 2
+            )
         
         return display
     
@@ -84,7 +302,7 @@ class Visualizer:
         confidence_threshold: float = 0.5
     ) -> np.ndarray:
         """
-        Draw detected pose skeletons on frame.
+        Draw detected pose skeletons on frame (in place).
         
         Args:
             frame: BGR image to draw on
@@ -92,32 +310,38 @@ class Visualizer:
             confidence_threshold: Minimum confidence to draw keypoint
             
         Returns:
-            Frame with skeletons drawn
+            The same frame, with skeletons drawn
         """
-        display = frame.copy()
+        display = frame
         
         if keypoints is None:
             return display
         
+        color = self.config.color_skeleton
+        start_idx, end_idx = self.SKELETON_CONNECTIONS.T
+        segments = []
+        
         for person_kp in keypoints:
             if len(person_kp) == 0:
                 continue
             
+            person_kp = np.asarray(person_kp)
+            visible = person_kp[:, 2] > confidence_threshold
+            pts = person_kp[:, :2].astype(np.int32)
+            
             # Draw keypoints
-            for kp in person_kp:
-                x, y, conf = kp
-                if conf > confidence_threshold:
-                    cv2.circle(display, (int(x), int(y)), 4, self.config.color_skeleton, -1)
+            for x, y in pts[visible].tolist():
+                cv2.circle(display, (x, y), 4, color, -1)
             
-            # Draw connections
-            for start_idx, end_idx in self.SKELETON_CONNECTIONS:
-                start_kp = person_kp[start_idx]
-                end_kp = person_kp[end_idx]
-                
-                if start_kp[2] > confidence_threshold and end_kp[2] > confidence_threshold:
-                    start_pt = (int(start_kp[0]), int(start_kp[1]))
-                    end_pt = (int(end_kp[0]), int(end_kp[1]))
-                    cv2.line(display, start_pt, end_pt, self.config.color_skeleton, 2)
+            # Collect connections: every edge with both ends visible
+            edges = visible[start_idx] & visible[end_idx]
+            if edges.any():
+                segments.extend(np.stack([pts[start_idx[edges]], pts[end_idx[edges]]], axis=1))
+        
+        # Draw every person's connections in one call (joints share the color,
+        # so drawing them after all the keypoints doesn't change the result)
+        if segments:
+            cv2.polylines(display, segments, False, color, 2)
         
         return display
     
@@ -129,7 +353,7 @@ class Visualizer:
         max_energy: float = 150.0
     ) -> np.ndarray:
         """
-        Draw an energy meter bar on the frame.
+        Draw an energy meter bar on the frame (in place).
         
         Args:
             frame: BGR image to draw on
@@ -138,16 +362,17 @@ class Visualizer:
             max_energy: Maximum expected energy for scaling
             
         Returns:
-            Frame with energy bar drawn
+            The same frame, with energy bar drawn
         """
-        display = frame.copy()
-        h, w = frame.shape[:2]
+        display = frame
+        w = frame.shape[1]
         
-        # Bar dimensions
-        bar_width = 200
-        bar_height = 20
-        bar_x = w - bar_width - 20
-        bar_y = 20
+        # Bar position only depends on the frame width
+        if self._bar_layout[0] != w:
+            self._bar_layout = (w, w - self.BAR_WIDTH - self.BAR_MARGIN, self.BAR_MARGIN)
+        _, bar_x, bar_y = self._bar_layout
+        bar_width = self.BAR_WIDTH
+        bar_height = self.BAR_HEIGHT
         
         # Background
         cv2.rectangle(
@@ -171,10 +396,10 @@ class Visualizer:
         thresh_x = bar_x + int((threshold / max_energy) * bar_width)
         cv2.line(display, (thresh_x, bar_y - 5), (thresh_x, bar_y + bar_height + 5), (255, 255, 255), 2)
         
-        # Labels
+        # Labels (changes nearly every frame, so a cached sprite would only miss)
         cv2.putText(
             display, f"Energy: {energy:.0f}", (bar_x, bar_y - 8),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.config.color_text, 1
+            self.FONT, 0.5, self.config.color_text, 1
         )
         
         return display
@@ -188,7 +413,7 @@ class Visualizer:
         total_zones: int
     ) -> np.ndarray:
         """
-        Draw current state and debug information.
+        Draw current state and debug information (in place).
         
         Args:
             frame: BGR image to draw on
@@ -198,35 +423,28 @@ class Visualizer:
             total_zones: Total number of zones
             
         Returns:
-            Frame with state info drawn
+            The same frame, with state info drawn
         """
-        display = frame.copy()
-        
-        # State colors
-        state_colors = {
-            "SEARCHING": (100, 100, 100),  # Gray
-            "LOCKED": (0, 255, 255),        # Yellow
-            "PROBATION": (0, 165, 255),     # Orange
-            "RALLY": (0, 255, 0)            # Green
-        }
-        color = state_colors.get(state_name, (255, 255, 255))
+        display = frame
+        color = self.STATE_COLORS.get(state_name, (255, 255, 255))
         
         # Draw state box
         cv2.rectangle(display, (10, 10), (200, 90), (0, 0, 0), -1)
         cv2.rectangle(display, (10, 10), (200, 90), color, 2)
         
         # Draw text
-        cv2.putText(
+        self._put_text(
             display, f"State: {state_name}", (20, 35),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2
+            0.6, color, 2
         )
+        # The timestamp changes nearly every frame: draw it directly rather than caching it
         cv2.putText(
             display, f"Time: {timestamp:.1f}s", (20, 55),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.config.color_text, 1
+            self.FONT, 0.5, self.config.color_text, 1
         )
-        cv2.putText(
+        self._put_text(
             display, f"Zones: {active_zones}/{total_zones}", (20, 75),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.config.color_text, 1
+            0.5, self.config.color_text, 1
         )
         
         return display
@@ -235,7 +453,7 @@ class Visualizer:
         self,
         frame: np.ndarray,
         zones: List[np.ndarray],
-        occupancy: List[bool],
+        occupancy: Optional[List[bool]],
         keypoints: Optional[np.ndarray],
         energy: float,
         threshold: float,
@@ -248,7 +466,7 @@ class Visualizer:
         Args:
             frame: BGR image to draw on
             zones: List of zone polygons
-            occupancy: Zone occupancy status
+            occupancy: Zone occupancy status (None to compute it from keypoints)
             keypoints: Raw keypoint data (can be None)
             energy: Current smoothed energy
             threshold: Current dynamic threshold
@@ -256,18 +474,38 @@ class Visualizer:
             timestamp: Current video timestamp
             
         Returns:
-            Frame with full overlay
+            New frame with full overlay (the input frame is left untouched)
         """
-        display = frame.copy()
+        if occupancy is None:
+            occupancy = self.compute_occupancy(zones, keypoints)
+        
+        scale = self.config.preview_scale
+        if scale < 1:
+            # Draw zones and skeletons on a downscaled frame (the resize doubles
+            # as the copy) and upscale once before the fixed-size HUD
+            display = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if zones is not self._scaled_src:
+                self._scaled_src = zones
+                self._scaled_zones = [(np.asarray(zone) * scale).astype(np.int32) for zone in zones]
+            zones = self._scaled_zones
+            if keypoints is not None:
+                keypoints = np.array(keypoints, dtype=np.float32)
+                keypoints[..., :2] *= scale
+        else:
+            # The only full-frame copy; every layer below draws into it in place
+            display = frame.copy()
         
         # Layer visualizations
-        display = self.draw_zones(display, zones, occupancy)
+        self.draw_zones(display, zones, occupancy)
         
         if keypoints is not None:
-            display = self.draw_skeletons(display, keypoints)
+            self.draw_skeletons(display, keypoints)
+        
+        if scale < 1:
+            display = cv2.resize(display, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_LINEAR)
         
-        display = self.draw_energy_bar(display, energy, threshold)
-        display = self.draw_state_info(
+        self.draw_energy_bar(display, energy, threshold)
+        self.draw_state_info(
             display, state_name, timestamp, 
             sum(occupancy), len(zones)
         )
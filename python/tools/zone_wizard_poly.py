@@ -21,12 +21,28 @@ Controls:
 """
 
 import argparse
+import queue
 import sys
+import threading
 import cv2
 import numpy as np
 import json
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+# Optional: decord gives fast random access for slider scrubbing
+# (OpenCV seeks back to the previous keyframe and decodes forward on every move)
+try:
+    from decord import VideoReader, cpu
+    HAS_DECORD = True
+except ImportError:
+    HAS_DECORD = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:  # orjson is optional; falls back to the stdlib json module
+    HAS_ORJSON = False
 
 # Zone colors (BGR)
 COLOR_SAVED = (0, 255, 0)       # Green for saved zones
@@ -46,6 +62,13 @@ class ZoneWizard:
     RECOMMENDED_ZONES = 4
     MIN_POINTS_PER_ZONE = 3
     
+    # Instruction panel geometry (bottom-left corner of the frame)
+    PANEL_HEIGHT = 140
+    PANEL_LEFT = 10
+    PANEL_RIGHT = 350
+    PANEL_MARGIN = 10
+    PANEL_LINE_STEP = 25
+    
     def __init__(self, video_path: str, output_file: str = 'court_zones.json'):
         self.video_path = video_path
         self.output_file = output_file
@@ -54,22 +77,107 @@ class ZoneWizard:
         self.current_points: List[Tuple[int, int]] = []
         
         self.cap = None
+        self.vr = None
         self.current_frame = None
+        # Slider seeks are decoded on a worker thread; both queues hold only the
+        # latest item (pending frame index in, decoded frame out)
+        self._seek_q: queue.Queue = queue.Queue(maxsize=1)
+        self._frame_q: queue.Queue = queue.Queue(maxsize=1)
+        self._seek_thread: Optional[threading.Thread] = None
         self.total_frames = 0
         self.window_name = "Zone Wizard - Draw Court Zones"
+        
+        # Scratch frame for the zone-fill blend, reused across redraws
+        self._overlay_buf = None
+        # Instruction panel chrome (background, border, static help lines), rendered once
+        self._panel_bg = None
+        # Set whenever the frame, zones or points change; the loop only redraws then
+        self._dirty = True
+        
+        # int32 arrays for drawing, rebuilt only after the zones / points change
+        self._zone_pts: List[np.ndarray] = []
+        self._zone_labels: List[Tuple[str, Tuple[int, int]]] = []
+        self._current_pts = np.empty((0, 2), dtype=np.int32)
+        self._zones_dirty = True
+        self._points_dirty = True
     
     def mouse_callback(self, event, x, y, flags, param):
         """Handle mouse clicks to add polygon vertices."""
         if event == cv2.EVENT_LBUTTONDOWN:
             self.current_points.append((x, y))
+            self._points_dirty = True
+            self._dirty = True
     
     def on_trackbar(self, val):
-        """Handle trackbar movement to scrub through video."""
+        """Handle trackbar movement: queue a seek, replacing any not yet started."""
+        self._put_latest(self._seek_q, val)
+    
+    @staticmethod
+    def _put_latest(q: queue.Queue, item):
+        """Put item on a single-slot queue, dropping whatever is still waiting."""
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        q.put_nowait(item)
+    
+    def _seek_worker(self):
+        """Decode requested frames off the UI thread (None stops the worker)."""
+        while True:
+            index = self._seek_q.get()
+            if index is None:
+                break
+            frame = self._read_frame(index)
+            if frame is not None:
+                self._put_latest(self._frame_q, frame)
+    
+    def _poll_seek(self):
+        """Show the most recently decoded seek frame, if one arrived."""
+        try:
+            self.current_frame = self._frame_q.get_nowait()
+            self._dirty = True
+        except queue.Empty:
+            pass
+    
+    def _open_video(self) -> bool:
+        """Open the video with decord when available, else OpenCV."""
+        if HAS_DECORD:
+            try:
+                self.vr = VideoReader(self.video_path, ctx=cpu(0))
+                self.total_frames = len(self.vr)
+                return True
+            except Exception as e:
+                print(f"⚠️  decord could not open video ({e}), using OpenCV")
+                self.vr = None
+        
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            return False
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return True
+    
+    def _read_frame(self, index: int) -> Optional[np.ndarray]:
+        """Decode one frame (BGR) by index, or None if it can't be read."""
+        if self.vr is not None:
+            # decord returns RGB
+            return cv2.cvtColor(self.vr[index].asnumpy(), cv2.COLOR_RGB2BGR)
         if self.cap is not None:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, val)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
             ret, frame = self.cap.read()
             if ret:
-                self.current_frame = frame
+                return frame
+        return None
+    
+    def _close_video(self):
+        """Stop the seek worker and release whichever video reader is open."""
+        if self._seek_thread is not None:
+            self._put_latest(self._seek_q, None)
+            self._seek_thread.join()
+            self._seek_thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.vr = None
     
     def draw_overlay(self) -> np.ndarray:
         """Draw all zones and current drawing on the frame."""
@@ -78,29 +186,44 @@ class ZoneWizard:
         
         display = self.current_frame.copy()
         
+        if self._zones_dirty:
+            self._zone_pts = [np.array(zone, np.int32) for zone in self.zones]
+            # Zone labels at the vertex mean (close enough to the centroid for a label)
+            self._zone_labels = []
+            for i, pts in enumerate(self._zone_pts):
+                if len(pts) >= 3:
+                    cx, cy = pts.mean(axis=0).astype(int)
+                    self._zone_labels.append((f"Z{i+1}", (int(cx) - 15, int(cy) + 5)))
+            self._zones_dirty = False
+        if self._points_dirty:
+            self._current_pts = np.array(self.current_points, np.int32).reshape(-1, 2)
+            self._points_dirty = False
+        
         # Draw saved zones (green, semi-transparent fill)
-        for i, zone in enumerate(self.zones):
-            pts = np.array(zone, np.int32)
+        if self.zones:
+            zone_pts = self._zone_pts
             
-            # Semi-transparent fill
-            overlay = display.copy()
-            cv2.fillPoly(overlay, [pts], COLOR_SAVED)
+            # Semi-transparent fill: all zones share a color, so fill and blend once
+            # (one fillPoly per zone: a multi-polygon call leaves overlaps unfilled)
+            if self._overlay_buf is None or self._overlay_buf.shape != display.shape:
+                self._overlay_buf = np.empty_like(display)
+            overlay = self._overlay_buf
+            np.copyto(overlay, display)
+            for pts in zone_pts:
+                cv2.fillPoly(overlay, [pts], COLOR_SAVED)
             cv2.addWeighted(overlay, 0.25, display, 0.75, 0, display)
             
-            # Outline
-            cv2.polylines(display, [pts], True, COLOR_SAVED, 2)
+            # Outlines
+            cv2.polylines(display, zone_pts, True, COLOR_SAVED, 2)
             
-            # Zone label at centroid
-            M = cv2.moments(pts)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                cv2.putText(display, f"Z{i+1}", (cx - 15, cy + 5),
+            # Zone labels
+            for label, origin in self._zone_labels:
+                cv2.putText(display, label, origin,
                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, COLOR_TEXT, 2)
         
         # Draw current zone being drawn (yellow)
         if len(self.current_points) > 0:
-            pts = np.array(self.current_points, np.int32)
+            pts = self._current_pts
             
             # Draw lines connecting points
             if len(self.current_points) > 1:
@@ -117,35 +240,47 @@ class ZoneWizard:
         
         return display
     
+    def _build_panel(self) -> np.ndarray:
+        """Render the static part of the instruction panel into a small tile."""
+        tile_h = self.PANEL_HEIGHT + 1
+        tile_w = self.PANEL_RIGHT - self.PANEL_LEFT + 1
+        panel = np.zeros((tile_h, tile_w, 3), dtype=np.uint8)
+        cv2.rectangle(panel, (0, 0), (tile_w - 1, tile_h - 1), (100, 100, 100), 1)
+        
+        # Help lines sit below the two dynamic status lines and a blank one
+        static_lines = [
+            "Click to add points | 'n' save zone",
+            "'r' reset | 'u' undo | 's' SAVE | 'q' quit"
+        ]
+        y = 15 + 3 * self.PANEL_LINE_STEP
+        for line in static_lines:
+            cv2.putText(panel, line, (20 - self.PANEL_LEFT, y),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_TEXT, 1)
+            y += self.PANEL_LINE_STEP
+        return panel
+    
     def _draw_instructions(self, display: np.ndarray):
         """Draw instruction panel on the frame."""
         h, w = display.shape[:2]
         
-        # Background panel
-        panel_height = 140
-        cv2.rectangle(display, (10, h - panel_height - 10), (350, h - 10),
-                     (0, 0, 0), -1)
-        cv2.rectangle(display, (10, h - panel_height - 10), (350, h - 10),
-                     (100, 100, 100), 1)
+        # Background panel: blit the pre-rendered chrome (clipped on tiny frames)
+        if self._panel_bg is None:
+            self._panel_bg = self._build_panel()
+        top = h - self.PANEL_HEIGHT - self.PANEL_MARGIN
+        y0, x1 = max(top, 0), min(self.PANEL_RIGHT + 1, w)
+        y1 = h - self.PANEL_MARGIN + 1
+        if y1 > y0 and x1 > self.PANEL_LEFT:
+            display[y0:y1, self.PANEL_LEFT:x1] = self._panel_bg[y0 - top:, :x1 - self.PANEL_LEFT]
         
-        # Status
+        # Status: only these two lines change between frames
         zones_drawn = len(self.zones)
         status_color = COLOR_SAVED if zones_drawn >= self.RECOMMENDED_ZONES else COLOR_DRAWING
         
-        lines = [
-            f"Zones: {zones_drawn}/{self.RECOMMENDED_ZONES} (recommended)",
-            f"Current zone: {len(self.current_points)} points",
-            "",
-            "Click to add points | 'n' save zone",
-            "'r' reset | 'u' undo | 's' SAVE | 'q' quit"
-        ]
-        
-        y = h - panel_height + 5
-        for i, line in enumerate(lines):
-            color = status_color if i == 0 else COLOR_TEXT
-            cv2.putText(display, line, (20, y),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-            y += 25
+        y = h - self.PANEL_HEIGHT + 5
+        cv2.putText(display, f"Zones: {zones_drawn}/{self.RECOMMENDED_ZONES} (recommended)", (20, y),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, status_color, 1)
+        cv2.putText(display, f"Current zone: {len(self.current_points)} points", (20, y + self.PANEL_LINE_STEP),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_TEXT, 1)
     
     def run(self) -> bool:
         """
@@ -155,19 +290,20 @@ class ZoneWizard:
             True if zones were saved, False if cancelled
         """
         # Open video
-        self.cap = cv2.VideoCapture(self.video_path)
-        if not self.cap.isOpened():
+        if not self._open_video():
             print(f"❌ Error: Could not open video: {self.video_path}")
             return False
         
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
         # Read first frame
-        ret, self.current_frame = self.cap.read()
-        if not ret:
+        self.current_frame = self._read_frame(0)
+        if self.current_frame is None:
             print("❌ Error: Could not read video frame")
             return False
         
+        # From here on only the seek worker touches the video reader
+        self._seek_thread = threading.Thread(target=self._seek_worker, daemon=True)
+        self._seek_thread.start()
+        
         # Setup window
         cv2.namedWindow(self.window_name)
         cv2.setMouseCallback(self.window_name, self.mouse_callback)
@@ -188,10 +324,12 @@ class ZoneWizard:
         print("  5. Press 's' when done to save")
         print("=" * 50 + "\n")
         
-        # Main loop
+        # Main loop: redraw only after a change (the window keeps showing the last image)
         while True:
-            display = self.draw_overlay()
-            cv2.imshow(self.window_name, display)
+            self._poll_seek()
+            if self._dirty:
+                cv2.imshow(self.window_name, self.draw_overlay())
+                self._dirty = False
             
             key = cv2.waitKey(30) & 0xFF
             
@@ -200,16 +338,23 @@ class ZoneWizard:
                     self.zones.append(self.current_points.copy())
                     print(f"✅ Zone {len(self.zones)} saved ({len(self.current_points)} points)")
                     self.current_points = []
+                    self._zones_dirty = True
+                    self._points_dirty = True
+                    self._dirty = True
                 else:
                     print(f"⚠️  Need at least {self.MIN_POINTS_PER_ZONE} points for a zone")
             
             elif key == ord('r'):  # Reset current zone
                 self.current_points = []
+                self._points_dirty = True
+                self._dirty = True
                 print("🔄 Current zone reset")
             
             elif key == ord('u'):  # Undo last point
                 if self.current_points:
                     self.current_points.pop()
+                    self._points_dirty = True
+                    self._dirty = True
                     print(f"↩️  Removed last point ({len(self.current_points)} remaining)")
             
             elif key == ord('s'):  # Save and quit
@@ -217,9 +362,12 @@ class ZoneWizard:
                     print("⚠️  No zones drawn! Draw at least one zone before saving.")
                     continue
                 
-                # Save to JSON
-                with open(self.output_file, 'w') as f:
-                    json.dump(self.zones, f, indent=2)
+                # Save to JSON (same 2-space layout either way)
+                if HAS_ORJSON:
+                    Path(self.output_file).write_bytes(orjson.dumps(self.zones, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(self.output_file, 'w') as f:
+                        json.dump(self.zones, f, indent=2)
                 
                 print(f"\n💾 Saved {len(self.zones)} zones to {self.output_file}")
                 
@@ -231,11 +379,11 @@ class ZoneWizard:
             
             elif key == ord('q') or key == 27:  # Quit without saving
                 print("\n❌ Cancelled - zones not saved")
-                self.cap.release()
+                self._close_video()
                 cv2.destroyAllWindows()
                 return False
         
-        self.cap.release()
+        self._close_video()
         cv2.destroyAllWindows()
         return True
 